@@ -0,0 +1,63 @@
+#! /usr/bin/env python
+#
+# memory.py
+#
+# Copyright (c) 2016 Junpei Kawamoto
+#
+# This software is released under the MIT License.
+#
+# http://opensource.org/licenses/mit-license.php
+#
+""" Benchmark of memory used to keep parsed argument specifications.
+"""
+import argparse
+import os
+import sys
+import tracemalloc
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+import dsargparse  # pylint: disable=wrong-import-position
+
+
+def allocated(factory, number):
+    """Measure bytes allocated to keep objects made by a factory.
+
+    Args:
+      factory: a callable taking an index and returning an object.
+      number: number of objects to be made.
+
+    Returns:
+      allocated bytes per object.
+    """
+    tracemalloc.start()
+    base = tracemalloc.get_traced_memory()[0]
+    objs = [factory(i) for i in range(number)]
+    size = tracemalloc.get_traced_memory()[0] - base
+    tracemalloc.stop()
+    del objs
+    return size / number
+
+
+def main():
+    """ The main function.
+
+    Returns:
+      Status code.
+    """
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--number", type=int, default=100000)
+    args = parser.parse_args()
+
+    helps = ["help text of arg{0}.".format(i) for i in range(args.number)]
+    res = dict(
+        dict=allocated(lambda i: {
+            "help": helps[i], "type": int, "default": i, "required": False}, args.number),
+        ArgSpec=allocated(lambda i: dsargparse.ArgSpec(
+            help=helps[i], type=int, default=i, required=False), args.number))
+    for name, size in res.items():
+        print("{0}: {1:.1f} bytes per argument".format(name, size))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
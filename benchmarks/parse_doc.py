@@ -0,0 +1,73 @@
+#! /usr/bin/env python
+#
+# parse_doc.py
+#
+# Copyright (c) 2016 Junpei Kawamoto
+#
+# This software is released under the MIT License.
+#
+# http://opensource.org/licenses/mit-license.php
+#
+""" Benchmark of docstring parsing on large Args sections.
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+import dsargparse  # pylint: disable=wrong-import-position
+
+_TYPES = ("", " (int)", " ( float )", " (list[int])", " (tuple[ str ])", " (bool)")
+
+
+def make_function(nargs, nlines):
+    """Make a function which has a large docstring.
+
+    Args:
+      nargs: number of documented arguments.
+      nlines: number of continuation lines of each help text.
+
+    Returns:
+      a function object.
+    """
+    doc = ["Benchmark function.", "", "Args:"]
+    for i in range(nargs):
+        doc.append("  arg{0}{1}: help text of arg{0}.".format(i, _TYPES[i % len(_TYPES)]))
+        doc.extend("    more details of arg{0}.".format(i) for _ in range(nlines))
+    doc.extend(["", "Returns:", "  nothing."])
+
+    def func(**kwargs): # pylint: disable=unused-argument
+        """Placeholder."""
+    func.__doc__ = "\n".join(doc)
+    return func
+
+
+def main():
+    """ The main function.
+
+    Returns:
+      Status code.
+    """
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--nargs", type=int, default=200)
+    parser.add_argument("--nlines", type=int, default=3)
+    parser.add_argument("--number", type=int, default=20)
+    args = parser.parse_args()
+
+    func = make_function(args.nargs, args.nlines)
+    samples = []
+    clear_caches = getattr(dsargparse, "_clear_caches", None)
+    for _ in range(args.number):
+        # Memoized sections and converters would turn later calls into lookups.
+        if clear_caches is not None: clear_caches()
+        start = time.perf_counter()
+        dsargparse._parse_doc(func)
+        samples.append(time.perf_counter() - start)
+    print("_parse_doc: {0:.3f} ms per call ({1} args, {2} lines each)".format(
+        min(samples) * 1000, args.nargs, args.nlines + 1))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
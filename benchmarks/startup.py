@@ -0,0 +1,168 @@
+#! /usr/bin/env python
+#
+# startup.py
+#
+# Copyright (c) 2016 Junpei Kawamoto
+#
+# This software is released under the MIT License.
+#
+# http://opensource.org/licenses/mit-license.php
+#
+""" Benchmark of docstring driven parser construction.
+
+This benchmark synthesizes a command line interface which has N sub commands
+taking M documented arguments each, and measures the stages of building and
+running it separately. Results are emitted as JSON so that they can be
+compared across versions.
+"""
+import argparse
+import json
+import os
+import platform
+import statistics
+import sys
+import tempfile
+import time
+import types
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+import dsargparse  # pylint: disable=wrong-import-position
+
+# Pairs of a type specification in a docstring and a default value.
+_KINDS = (
+    ("int", "0"),
+    ("float", "0.5"),
+    ("str", "'value'"),
+    ("list[int]", "[1, 2]"),
+    ("bool", "False"),
+    ("", "3"),
+)
+
+
+def make_module(ncommands, nargs):
+    """Make a module which defines sub command functions.
+
+    Args:
+      ncommands: number of sub commands.
+      nargs: number of documented arguments of each sub command.
+
+    Returns:
+      a module object, which has ``main`` and ``commands`` attributes.
+    """
+    source = ['"""Synthesized command line interface.\n\nUsed to benchmark dsargparse."""']
+    for i in range(ncommands):
+        params, docs = [], []
+        for j in range(nargs):
+            spec, default = _KINDS[j % len(_KINDS)]
+            params.append("arg{0}={1}".format(j, default))
+            docs.append("      arg{0}{1}: help text of arg{0}.\n        It continues to the next line.".format(
+                j, " ({0})".format(spec) if spec else ""))
+        source.append(
+            'def cmd{0}({1}):\n'
+            '    """Run command {0}.\n\n'
+            '    This is the detailed description of command {0}.\n\n'
+            '    Args:\n{2}\n\n'
+            '    Returns:\n'
+            '      zero.\n'
+            '    """\n'
+            '    return 0\n'.format(i, ", ".join(params), "\n".join(docs)))
+    source.append('def main():\n    """The main function."""\n')
+    source.append('commands = [cmd{0}]'.format(", cmd".join(str(i) for i in range(ncommands)))
+                  if ncommands else 'commands = []')
+
+    module = types.ModuleType("dsargparse_benchmark_cli")
+    sys.modules[module.__name__] = module
+    exec(compile("\n\n".join(source), "<benchmark>", "exec"), module.__dict__) # pylint: disable=exec-used
+    return module
+
+
+def measure(module):
+    """Measure each stage of building and running a parser once.
+
+    In-memory caches of dsargparse are cleared first so that every sample
+    measures a cold start. Stages using APIs the measured version of
+    dsargparse lacks, such as ``dump`` and ``load``, are skipped.
+
+    Args:
+      module: a module made by :func:`make_module`.
+
+    Returns:
+      a dictionary mapping stage names to elapsed seconds.
+    """
+    res = {}
+    clear_caches = getattr(dsargparse, "_clear_caches", None)
+    if clear_caches is not None: clear_caches()
+    start = time.perf_counter()
+    parser = dsargparse.ArgumentParser(main=module.main)
+    res["ArgumentParser"] = time.perf_counter() - start
+
+    subparsers = parser.add_subparsers()
+    start = time.perf_counter()
+    parsers = [subparsers.add_parser(func) for func in module.commands]
+    res["add_parser"] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    for p in parsers:
+        p.add_arguments_auto()
+    res["add_arguments_auto"] = time.perf_counter() - start
+
+    if hasattr(parser, "dump") and hasattr(dsargparse.ArgumentParser, "load"):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "parser.pickle")
+            parser.dump(path)
+            start = time.perf_counter()
+            dsargparse.ArgumentParser.load(path)
+            res["load"] = time.perf_counter() - start
+
+    argv = ["cmd0"] if module.commands else []
+    if module.commands:
+        start = time.perf_counter()
+        parser.parse_args(argv)
+        res["parse_args"] = time.perf_counter() - start
+
+        start = time.perf_counter()
+        parser.parse_and_run(args=argv)
+        res["parse_and_run"] = time.perf_counter() - start
+    return res
+
+
+def main():
+    """ The main function.
+
+    Returns:
+      Status code.
+    """
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawTextHelpFormatter)
+    parser.add_argument("--commands", type=int, nargs="+", default=[10, 100], help="numbers of sub commands")
+    parser.add_argument("--args", type=int, nargs="+", default=[5, 20], help="numbers of arguments per command")
+    parser.add_argument("--repeat", type=int, default=5, help="number of repetitions")
+    parser.add_argument("--output", help="path to the output JSON file; stdout if not given")
+    args = parser.parse_args()
+
+    results = []
+    for ncommands in args.commands:
+        for nargs in args.args:
+            module = make_module(ncommands, nargs)
+            samples = [measure(module) for _ in range(args.repeat)]
+            stages = {}
+            for key in samples[0]:
+                values = [s[key] for s in samples]
+                stages[key] = dict(min=min(values), median=statistics.median(values))
+            results.append(dict(commands=ncommands, args=nargs, stages=stages))
+
+    report = dict(
+        python=platform.python_version(),
+        implementation=platform.python_implementation(),
+        repeat=args.repeat,
+        results=results)
+    if args.output:
+        with open(args.output, "w") as fp:
+            json.dump(report, fp, indent=2)
+    else:
+        json.dump(report, sys.stdout, indent=2)
+        sys.stdout.write("\n")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -14,18 +14,27 @@ from docstrings. It also sets up functions to be run for each sub command,
 and provides a helper function which parses args and run a selected command.
 """
 import argparse
+import functools
 import itertools
-import inspect
-import textwrap
+import os
+import sys
 import re
 
-# Load objects defined in argparse.
-for name in argparse.__all__:
-    if name != "ArgumentParser":
-        globals()[name] = getattr(argparse, name)
+# Objects defined in argparse are loaded on access.
 __all__ = argparse.__all__
 
 
+def __getattr__(name):
+    """Return an object defined in argparse (PEP 562)."""
+    if name != "ArgumentParser" and name in argparse.__all__:
+        return getattr(argparse, name)
+    raise AttributeError("module {0!r} has no attribute {1!r}".format(__name__, name))
+
+
+def __dir__():
+    return sorted(set(globals()) | set(argparse.__all__))
+
+
 _HELP = "help"
 _DEFAULT = 'default'
 _TYPE = 'type'
@@ -40,6 +49,117 @@ _KEYWORDS_OTHERS = ("Returns:", "Raises:", "Yields:", "Usage:")
 _KEYWORDS = _KEYWORDS_ARGS + _KEYWORDS_OTHERS
 
 
+class Profiler(object):
+    """Recorder of wall time and call counts of dsargparse internals.
+
+    Records are grouped by the name of the measured function and the sub
+    command, i.e. the function or the parser, it worked on. Times are
+    inclusive; time spent in nested measured functions is counted in both.
+
+    Args:
+      output: path to a JSON file the report is written to. If not given,
+        a compact report is written to the standard error.
+    """
+
+    def __init__(self, output=None):
+        self.output = output
+        self.records = {}
+
+    def add(self, name, subject, elapsed):
+        """Add a record."""
+        record = self.records.setdefault((name, subject), [0, 0.])
+        record[0] += 1
+        record[1] += elapsed
+
+    def report(self):
+        """Return records as a list of dictionaries sorted by total time."""
+        return [
+            dict(name=name, subject=subject, calls=calls, seconds=seconds)
+            for (name, subject), (calls, seconds)
+            in sorted(self.records.items(), key=lambda v: -v[1][1])]
+
+    def dump(self):
+        """Write the report to the output."""
+        import json
+
+        report = self.report()
+        if self.output:
+            with open(self.output, "w") as fp:
+                json.dump(report, fp, indent=2)
+            return
+        sys.stderr.write("dsargparse profile (inclusive wall time):\n")
+        for r in report:
+            sys.stderr.write("  {0:<32} {1:<24} {2:>6} calls {3:>10.3f} ms\n".format(
+                r["name"], r["subject"], r["calls"], r["seconds"] * 1000))
+
+
+_profiler = None
+# Whether the handler writing the report at exit is registered.
+_profile_registered = False
+
+
+def enable_profile(output=None):
+    """Enable profiling of docstring parsing, parser building, and dispatch.
+
+    The report is written when the interpreter exits. Profiling is also
+    enabled at import when the environment variable ``DSARGPARSE_PROFILE`` is
+    set; its value is used as the output path unless it is ``1`` or ``stderr``.
+
+    Args:
+      output: path to a JSON file the report is written to. If not given,
+        the report is written to the standard error.
+
+    Returns:
+      the :class:`Profiler` instance now in use.
+    """
+    import atexit
+
+    global _profiler, _profile_registered # pylint: disable=global-statement
+    if not _profile_registered: atexit.register(lambda: _profiler and _profiler.dump())
+    _profile_registered = True
+    _profiler = Profiler(output)
+    return _profiler
+
+
+def disable_profile():
+    """Disable profiling, discarding records."""
+    global _profiler # pylint: disable=global-statement
+    _profiler = None
+
+
+def _profiled(name, subject):
+    """Decorate a function to be measured while profiling is enabled.
+
+    Args:
+      name: name of the record.
+      subject: function which takes the same arguments as the decorated one
+        and returns the name of the sub command the call works on.
+    """
+    def decorator(func):
+        """Wrap the function."""
+        @functools.wraps(func)
+        def _(*args, **kwargs):
+            if _profiler is None: return func(*args, **kwargs)
+            import time
+            start = time.perf_counter()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                _profiler.add(name, subject(*args, **kwargs), time.perf_counter() - start)
+        return _
+    return decorator
+
+
+def _name_of(obj):
+    """Name of a function or a module used in profile records."""
+    return getattr(obj, "__name__", None) or repr(obj)
+
+
+if os.environ.get("DSARGPARSE_PROFILE"):
+    enable_profile(None if os.environ["DSARGPARSE_PROFILE"] in ("1", "stderr")
+                   else os.environ["DSARGPARSE_PROFILE"])
+
+
 def _checker(keywords):
     """Generate a checker which tests a given value not starts with keywords."""
     def _(v):
@@ -51,198 +171,1803 @@ def _checker(keywords):
     return _
 
 
+# Memoized map of functions to their default argument values.
+_signatures = None
+
+
+def _signature_defaults(func):
+    """Return a map of argument names to default values of a function.
+
+    Both positional and keyword-only arguments are covered. The result is
+    computed once per function and shared until the function is collected.
+
+    Args:
+      func: function object.
+
+    Returns:
+      a dictionary.
+    """
+    import inspect
+    import weakref
+
+    global _signatures # pylint: disable=global-statement
+    if _signatures is None: _signatures = weakref.WeakKeyDictionary()
+    try:
+        return _signatures[func]
+    except (KeyError, TypeError):
+        pass
+
+    defaults = {}
+    try:
+        spec = inspect.getfullargspec(func)
+    except TypeError:
+        pass
+    else:
+        if spec.defaults: defaults.update(zip(spec.args[-len(spec.defaults):], spec.defaults))
+        if spec.kwonlydefaults: defaults.update(spec.kwonlydefaults)
+
+    try: _signatures[func] = defaults
+    except TypeError: pass
+    return defaults
+
+
+@_profiled("extract_default_from_signature", lambda argname, func: _name_of(func))
 def extract_default_from_signature(argname, func):
-    res = inspect.getfullargspec(func)
-    args, defaults = res[0], res[3]
+    defaults = _signature_defaults(func)
+    if argname in defaults: status, default = 'valid', defaults[argname]
+    else: status, default = 'invalid', None
+    return status, default
+
+
+_MISSING = object()
+
+
+class ArgSpec(object):
+    """Specification of an argument extracted from a docstring.
+
+    Instances are immutable and keep fields in slots instead of a dictionary.
+    For backward compatibility, they also behave as a read-only mapping from
+    keyword names of ``add_argument`` to values; ``default`` is included only
+    if the function defines a default value of the argument.
+    """
+
+    __slots__ = (_HELP, _TYPE, _NARGS, _ACTION, _DEFAULT, _REQUIRED)
+
+    def __init__(self, help=None, type=None, nargs=None, action=None, default=_MISSING, required=None): # pylint: disable=redefined-builtin
+        for key, value in zip(self.__slots__, (help, type, nargs, action, default, required)):
+            object.__setattr__(self, key, value)
+
+    def __setattr__(self, name, value):
+        raise AttributeError("ArgSpec is immutable")
+
+    def __reduce__(self):
+        return ArgSpec, (), dict(self.items())
+
+    def __setstate__(self, state):
+        for key, value in state.items():
+            object.__setattr__(self, key, value)
+
+    def keys(self):
+        """Return names of fields which have values."""
+        return [key for key in self.__slots__ if key != _DEFAULT or self.default is not _MISSING]
+
+    def items(self):
+        """Return pairs of field names and values."""
+        return [(key, getattr(self, key)) for key in self.keys()]
+
+    def values(self):
+        """Return values of fields."""
+        return [getattr(self, key) for key in self.keys()]
+
+    def get(self, key, default=None):
+        """Return the value of a field if it exists, otherwise ``default``."""
+        return self[key] if key in self else default
+
+    def __getitem__(self, key):
+        if key not in self: raise KeyError(key)
+        return getattr(self, key)
+
+    def __contains__(self, key):
+        return key in self.__slots__ and (key != _DEFAULT or self.default is not _MISSING)
+
+    def __iter__(self):
+        return iter(self.keys())
+
+    def __len__(self):
+        return len(self.keys())
+
+    def __eq__(self, other):
+        if isinstance(other, (ArgSpec, dict)): return dict(self.items()) == dict(other.items())
+        return NotImplemented
+
+    def __ne__(self, other):
+        res = self.__eq__(other)
+        return res if res is NotImplemented else not res
+
+    __hash__ = None
+
+    def __repr__(self):
+        return "ArgSpec({0})".format(", ".join("{0}={1!r}".format(k, v) for k, v in self.items()))
+
+
+# An entry of an Args section: ``name (type): help text``.
+_ARG_ENTRY = re.compile(r'([^\s]+?)\s*(\(\s*([^:]+?)\s*\))?\s*:(.*)', re.DOTALL)
+# Tokens of a type specification such as ``dict[str, int]`` or ``int | None``.
+_TYPE_TOKEN = re.compile(r'\s*(?:([\w.]+)|(\.\.\.)|([\[\],|]))')
+
+
+def _tokenize_args(args_desc):
+    """Split an Args description into entries.
+
+    Lines which start with white spaces are continuation of the previous
+    entry.
+
+    Args:
+      args_desc: description of args.
+
+    Returns:
+      a list of entry strings.
+    """
+    entries = []
+    for line in args_desc.splitlines():
+        if not line: continue
+        if _starts_with_white(line):
+            if entries: entries[-1].append(line)
+            continue
+        assert ':' in line
+        entries.append([line])
+    return ['\n'.join(entry) if len(entry) > 1 else entry[0] + '\n' for entry in entries]
+
+
+def _parse_arg_entry(entry):
+    """Parse an entry of an Args section.
+
+    Args:
+      entry: an entry string made by :func:`_tokenize_args`.
+
+    Returns:
+      a tuple of key, type specification, and help text.
+    """
+    m = _ARG_ENTRY.match(entry)
+    if m is None:
+        entry = entry.strip()
+        return entry, entry, entry
+    return m.group(1).strip(), (m.group(3) or '').strip(), m.group(4).strip()
+
+
+class _Converter(object):
+    """Base class of converters made for type specifications.
+
+    A converter is a callable given to ``type`` of ``add_argument``. It is
+    created from the arguments stored in ``_args``, so that it can be pickled
+    and frozen.
+    """
+
+    __name__ = "value"
+
+    def __init__(self, *args):
+        self._args = args
+
+    def __reduce__(self):
+        return type(self), self._args
+
+    def __eq__(self, other):
+        return type(self) is type(other) and self._args == other._args
+
+    def __ne__(self, other):
+        return not self == other
+
+    def __hash__(self):
+        return hash((type(self), self._args))
+
+    def __repr__(self):
+        return "{0}({1})".format(type(self).__name__, ", ".join(map(repr, self._args)))
+
+
+class _ISOFormat(_Converter):
+    """Converter to date and time objects from ISO 8601 strings."""
+
+    def __init__(self, cls):
+        super(_ISOFormat, self).__init__(cls)
+        self.__name__ = cls.__name__
+
+    def __call__(self, value):
+        return self._args[0].fromisoformat(value)
+
+
+class _EnumMember(_Converter):
+    """Converter to a member of an enum from its name or its value."""
+
+    def __init__(self, cls):
+        super(_EnumMember, self).__init__(cls)
+        self.__name__ = cls.__name__
+
+    def __call__(self, value):
+        cls = self._args[0]
+        if value in cls.__members__: return cls.__members__[value]
+        for member in cls:
+            if str(member.value) == value: return member
+        raise ValueError("{0!r} is not a member of {1}".format(value, cls.__name__))
+
+
+class _Mapping(_Converter):
+    """Converter to a dictionary from ``key=value`` pairs separated by commas."""
+
+    __name__ = "dict"
+
+    def __call__(self, value):
+        key_type, value_type = self._args
+        res = {}
+        for item in value.split(","):
+            if not item.strip(): continue
+            k, sep, v = item.partition("=")
+            if not sep: raise ValueError("{0!r} is not a key=value pair".format(item))
+            res[key_type(k.strip())] = value_type(v.strip())
+        return res
+
+
+class _Optional(_Converter):
+    """Converter which returns None for ``None`` or an empty string."""
+
+    def __init__(self, type_):
+        super(_Optional, self).__init__(type_)
+        self.__name__ = getattr(type_, "__name__", "value")
+
+    def __call__(self, value):
+        if value in ("", "None", "none"): return None
+        return self._args[0](value)
+
+
+# Names of types which are not builtins, mapped to dotted paths imported on demand.
+_TYPE_NAMES = {
+    "Path": "pathlib.Path",
+    "PurePath": "pathlib.PurePath",
+    "datetime": "datetime.datetime",
+    "date": "datetime.date",
+    "time": "datetime.time",
+    "Decimal": "decimal.Decimal",
+    "Fraction": "fractions.Fraction",
+    "UUID": "uuid.UUID",
+}
+_SEQUENCE_TYPES = frozenset(("list", "tuple", "set", "frozenset", "List", "Tuple", "Set", "Sequence", "Iterable"))
+_MAPPING_TYPES = frozenset(("dict", "Dict", "Mapping"))
+_UNION_TYPES = frozenset(("Optional", "Union"))
+
+_converters = {}
+# List collecting pairs of type names and classes resolved by _parse_type_spec, if not None.
+_resolving = None
+
+
+def register_type(name, converter):
+    """Register a converter used for a type name in docstrings.
+
+    Registered names take precedence over names defined in modules.
+
+    Args:
+      name: type name such as ``Color`` or ``ipaddress.IPv4Address``.
+      converter: callable which takes a string and returns a converted value,
+        or a dotted path to such a callable.
+    """
+    _TYPE_NAMES[name] = converter
+    _converters.clear()
+
+
+def _import_path(path):
+    """Import an object from a dotted path; return None if it cannot be found."""
+    import importlib
+
+    names = path.split(".")
+    for i in range(len(names) - 1, 0, -1):
+        try: obj = importlib.import_module(".".join(names[:i]))
+        except ImportError: continue
+        try:
+            for name in names[i:]: obj = getattr(obj, name)
+        except AttributeError:
+            return None
+        return obj
+    return None
+
+
+def _lookup_type(name, namespace):
+    """Find the class a type name refers to.
+
+    Registered names are checked first, then names in the given namespace,
+    builtins, and finally dotted paths are imported. Except registered
+    converters, only classes are accepted so that docstrings cannot refer
+    arbitrary functions.
+    """
+    import builtins
+
+    if name in _TYPE_NAMES:
+        obj = _TYPE_NAMES[name]
+        return _import_path(obj) if isinstance(obj, str) else obj
+
+    names = name.split(".")
+    if names[0] in namespace: obj = namespace[names[0]]
+    elif hasattr(builtins, names[0]): obj = getattr(builtins, names[0])
+    else: obj, names = _import_path(name) if len(names) > 1 else None, []
+    for attr in names[1:]:
+        obj = getattr(obj, attr, None)
+    return obj if isinstance(obj, type) else None
+
+
+def _as_converter(obj):
+    """Wrap a type whose constructor cannot convert strings by itself."""
+    if not isinstance(obj, type): return obj
+    enum = sys.modules.get("enum")
+    if enum is not None and issubclass(obj, enum.Enum): return _EnumMember(obj)
+    dt = sys.modules.get("datetime")
+    if dt is not None and issubclass(obj, (dt.date, dt.time)): return _ISOFormat(obj)
+    return obj
+
+
+def _parse_type_tree(type_):
+    """Parse a type specification to a tree of ``(name, [children])``.
+
+    ``A | B`` is represented as ``("Union", [A, B])``.
+
+    Raises:
+      ValueError: if the specification is malformed.
+    """
+    tokens, pos = [], 0
+    while pos < len(type_.rstrip()):
+        m = _TYPE_TOKEN.match(type_, pos)
+        if m is None: raise ValueError(type_)
+        tokens.append(m.group(m.lastindex))
+        pos = m.end()
+    tokens.append(None)
+
+    def parse(i):
+        name = tokens[i]
+        if name is None or name in "[],|": raise ValueError(type_)
+        children, i = [], i + 1
+        if tokens[i] == "[":
+            while True:
+                child, i = parse(i + 1)
+                children.append(child)
+                if tokens[i] == "]": break
+                if tokens[i] != ",": raise ValueError(type_)
+            i += 1
+        node = (name, children)
+        if tokens[i] == "|":
+            other, i = parse(i + 1)
+            node = ("Union", [node] + (other[1] if other[0] == "Union" else [other]))
+        return node, i
+
+    tree, i = parse(0)
+    if tokens[i] is not None: raise ValueError(type_)
+    return tree
+
+
+def _build_converter(node, namespace, nested=False, resolved=None):
+    """Build a type and nargs from a node of a type tree.
+
+    Names in the tree are strings, or classes if it is made from annotations.
+    If `resolved` is given, pairs of looked up names and found classes are
+    appended to it.
+    """
+    name, children = node
+    if name in _UNION_TYPES:
+        children = [c for c in children if c[0] != "None"]
+        if len(children) != 1: return None, None
+        type_, nargs = _build_converter(children[0], namespace, nested, resolved)
+        if nargs is None and type_ is not None and type_ is not bool: type_ = _Optional(type_)
+        return type_, nargs
+    if name in _SEQUENCE_TYPES:
+        if nested: return None, None
+        children = [c for c in children if c[0] != "..."]
+        if len(children) > 1 and any(c != children[0] for c in children): return None, None
+        if not children: return None, '+'
+        type_ = _build_converter(children[0], namespace, True, resolved)[0]
+        return (type_, '+') if type_ is not None else (None, None)
+    if name in _MAPPING_TYPES:
+        if not children: children = [("str", []), ("str", [])]
+        if len(children) != 2: return None, None
+        key_type, value_type = (_build_converter(c, namespace, True, resolved)[0] for c in children)
+        if key_type is None or value_type is None: return None, None
+        return _Mapping(key_type, value_type), None
+    if children: return None, None
+
+    if isinstance(name, str):
+        obj = _lookup_type(name, namespace)
+        if resolved is not None: resolved.append((name, obj))
+    else: obj = name if isinstance(name, type) else None
+    if obj is None: return None, None
+    return _as_converter(obj), None
+
+
+def _namespace_of(func):
+    """Return the global namespace type names in the docstring of a function refer."""
+    namespace = getattr(func, "__globals__", None)
+    if namespace is None: namespace = getattr(_module_of(func), "__dict__", {})
+    return namespace
+
+
+def _parse_type_spec(type_, func=None):
+    """Convert a type specification to a type and nargs.
+
+    The specification is parsed without evaluating it, and type names are
+    resolved as :func:`_lookup_type` does, in the module defining `func`.
+    Results are cached per specification and namespace, and reused while
+    the names still refer to the same classes, e.g. until the module is
+    reloaded.
+
+    Args:
+      type_: type specification string such as ``int``, ``list[int]``,
+        ``pathlib.Path``, ``dict[str, int]``, or ``Optional[float]``.
+      func: function whose docstring has the specification.
+
+    Returns:
+      a tuple of type and nargs; (None, None) if the specification cannot be resolved.
+    """
+    if type_ == '': return None, None
+
+    namespace = _namespace_of(func)
+    key = (type_, id(namespace))
+    cached = _converters.get(key)
+    if cached is not None and all(_lookup_type(name, namespace) is obj for name, obj in cached[1]):
+        if _resolving is not None: _resolving.extend(cached[1])
+        return cached[0]
+
+    resolved = []
+    try: res = _build_converter(_parse_type_tree(type_), namespace, resolved=resolved)
+    except ValueError: res = None, None
+    _converters[key] = (res, resolved)
+    if _resolving is not None: _resolving.extend(resolved)
+    return res
+
+
+def _annotation_tree(hint):
+    """Convert a type annotation to a tree as :func:`_parse_type_tree` makes.
+
+    Raises:
+      ValueError: if a string in the annotation is malformed.
+    """
+    if hint is None or hint is type(None): return ("None", [])
+    if hint is Ellipsis: return ("...", [])
+    if isinstance(hint, str): return _parse_type_tree(hint)
+    if hasattr(hint, "__forward_arg__"): return _parse_type_tree(hint.__forward_arg__)
+    if hasattr(hint, "__metadata__"): return _annotation_tree(hint.__origin__)
+
+    args = getattr(hint, "__args__", None)
+    if args is None: return (hint, [])
+    origin = getattr(hint, "__origin__", None)
+    name = getattr(origin, "_name", None) or getattr(origin, "__name__", None) or "Union"
+    return (name, [_annotation_tree(arg) for arg in args])
+
+
+_annotations = None
+
+
+def _annotated_types(func):
+    """Return types and nargs given by annotations of arguments of a function.
+
+    String annotations are resolved by ``typing.get_type_hints``; if it fails,
+    they are parsed as type specifications in docstrings. The result is
+    computed once per function and shared until the function is collected.
+
+    Args:
+      func: function object.
+
+    Returns:
+      a dictionary mapping argument names to tuples of type and nargs.
+    """
+    import weakref
+
+    global _annotations # pylint: disable=global-statement
+    if _annotations is None: _annotations = weakref.WeakKeyDictionary()
+    try:
+        return _annotations[func]
+    except (KeyError, TypeError):
+        pass
+
+    hints = getattr(func, "__annotations__", None) or {}
+    if any(isinstance(hint, str) for hint in hints.values()):
+        import typing
+        try: hints = typing.get_type_hints(func)
+        except Exception: pass # pylint: disable=broad-except
+
+    namespace = _namespace_of(func)
+    res = {}
+    for key, hint in hints.items():
+        if key == "return": continue
+        try: res[key] = _build_converter(_annotation_tree(hint), namespace)
+        except ValueError: res[key] = None, None
+
+    try: _annotations[func] = res
+    except TypeError: pass
+    return res
+
+
+@_profiled("_parse_args", lambda entries, func: _name_of(func))
+def _parse_args(entries, func):
+    '''Parse argument entries of a docstring
+
+    Parse given argument entries and return in dictionary form.
+
+    Args:
+        entries: list of tuples of an argument name, a type specification,
+            and a help text, which :meth:`DocStyle.parse` returns.
+        func: function which holds args this func analyzes
+
+    Returns:
+        a dictionary mapping argument names to :class:`ArgSpec` objects.
+    '''
+    def guess_type_nargs(default):
+        if default is None:
+            return None, None
+        elif isinstance(default, (list, tuple)):
+            nargs = '+'
+            if default: type_ = type(default[0])
+            else: type_ = None
+        else: nargs, type_ = None, type(default)
+        return _as_converter(type_), nargs
+
+    argmap = {}
+    annotated = _annotated_types(func)
+
+    for key, type_spec, value in entries:
+        type_, nargs = annotated.get(key, (None, None))
+        if (type_ is None) and (nargs is None): type_, nargs = _parse_type_spec(type_spec, func)
+        default_status, default = extract_default_from_signature(key, func)
+        if (type_ is None) and (nargs is None): type_, nargs = guess_type_nargs(default)
+        if (type_ is bool) and (nargs is None): default, type_, action = False, None, 'store_true'
+        else: action = None
+
+        if default_status != 'valid': default = _MISSING
+        argmap[key] = ArgSpec(
+            help=value, type=type_, nargs=nargs, action=action,
+            default=default, required=default is _MISSING)
+    return argmap
+
+
+def _starts_with_white(line):
+    '''check if starts with a white
+
+    Args:
+        line: a string line
+
+    Returns:
+        bool
+    '''
+    return line[:1].isspace()
+
+
+class DocStyle(object):
+    """Base class of parsers of a docstring style.
+
+    A parser splits lines of a docstring into description lines and entries
+    of arguments in one pass. To support another style, implement a subclass
+    and register an instance with :func:`register_doc_style`.
+    """
+
+    #: Name of the style.
+    name = None
+
+    def detect(self, lines):
+        """Check lines of a docstring are written in this style.
+
+        Args:
+          lines: list of lines of a docstring.
+
+        Returns:
+          True if this parser should parse the docstring.
+        """
+        return False
+
+    def parse(self, lines):
+        """Split lines of a docstring.
+
+        Args:
+          lines: list of lines of a docstring.
+
+        Returns:
+          a tuple of a list of description lines, and a list of tuples of an
+          argument name, a type specification, and a help text.
+        """
+        raise NotImplementedError
+
+
+class GoogleStyle(DocStyle):
+    """Parser of Google style docstrings, which have an ``Args:`` section.
+
+    A section starts with a line such as ``Args:`` or ``Returns: value`` and
+    ends at the next section or at a line indented no deeper than its header.
+    """
+
+    name = "google"
+    _ARGS = frozenset(_KEYWORDS_ARGS + ("Arguments:", "Keyword Args:", "Keyword Arguments:", "Parameters:"))
+    _OTHERS = frozenset(_KEYWORDS_OTHERS + ("Return:", "Yield:"))
+
+    def detect(self, lines):
+        return True
+
+    def parse(self, lines):
+        import textwrap
+
+        descriptions, args = [], []
+        state, indent = "description", 0
+        for line in lines:
+            if not line: continue
+            stripped = line.lstrip()
+            if state == "args" and stripped and len(line) - len(stripped) <= indent: state = None
+            head = stripped.partition(":")[0] + ":" if ":" in stripped else None
+            if head in self._ARGS or head in self._OTHERS:
+                state = "args" if head in self._ARGS else None
+                indent = len(line) - len(stripped)
+            elif state == "description": descriptions.append(line)
+            elif state == "args": args.append(line)
+        entries = _tokenize_args(textwrap.dedent("\n".join(args)))
+        return descriptions, [_parse_arg_entry(entry) for entry in entries]
+
+
+class NumpyStyle(DocStyle):
+    """Parser of NumPy style docstrings, which have a ``Parameters`` section.
+
+    A section header is a line followed by a line of dashes. Each entry is
+    ``name : type`` followed by indented help lines.
+    """
+
+    name = "numpy"
+    _ARGS = frozenset(("Parameters", "Other Parameters", "Keyword Arguments", "Arguments"))
+    _SECTIONS = _ARGS | frozenset((
+        "Returns", "Yields", "Receives", "Raises", "Warns", "Warnings", "See Also",
+        "Notes", "References", "Examples", "Attributes", "Methods"))
+
+    _HEADER = re.compile(r"^[ \t]*({0})[ \t]*\n[ \t]*-+[ \t]*$".format(
+        "|".join(sorted(map(re.escape, _SECTIONS)))), re.MULTILINE)
+
+    @staticmethod
+    def _underline(line):
+        line = line.strip()
+        return bool(line) and not line.strip("-")
+
+    def detect(self, lines):
+        return self._HEADER.search("\n".join(lines)) is not None
+
+    def parse(self, lines):
+        import textwrap
+
+        descriptions, args = [], []
+        state, header = "description", False
+        for line, following in zip(lines, lines[1:] + [""]):
+            if header:
+                header = False
+                continue
+            if line.strip() and self._underline(following):
+                state = "args" if line.strip() in self._ARGS else None
+                header = True
+            elif state == "description":
+                if line: descriptions.append(line)
+            elif state == "args": args.append(line)
+
+        items = []
+        for line in textwrap.dedent("\n".join(args)).splitlines():
+            if not line.strip(): continue
+            if _starts_with_white(line):
+                if items: items[-1][2].append(line)
+                continue
+            names, _, spec = line.partition(":")
+            items.append((names, spec, []))
+
+        entries = []
+        for names, spec, helps in items:
+            spec = ", ".join(
+                t for t in (t.strip() for t in spec.split(","))
+                if t and t != "optional" and not t.startswith("default"))
+            value = textwrap.dedent("\n".join(helps)).strip()
+            for name in names.split(","):
+                entries.append((name.strip().lstrip("*"), spec, value))
+        return descriptions, entries
+
+
+class SphinxStyle(DocStyle):
+    """Parser of Sphinx style docstrings, which have ``:param name:`` fields.
+
+    Types are given as ``:param type name:`` or ``:type name: type``.
+    """
+
+    name = "sphinx"
+    _PARAMS = frozenset(("param", "parameter", "arg", "argument", "key", "keyword"))
+
+    _FIELD = re.compile(r"^[ \t]*:(?:param|parameter|arg) ", re.MULTILINE)
+
+    def detect(self, lines):
+        return self._FIELD.search("\n".join(lines)) is not None
+
+    def parse(self, lines):
+        descriptions, params, types = [], [], {}
+        fields, current = False, None
+        for line in lines:
+            stripped = line.strip()
+            if stripped.startswith(":"):
+                fields, current = True, None
+                field, sep, body = stripped[1:].partition(":")
+                words = field.split()
+                if not sep or len(words) < 2: continue
+                if words[0] in self._PARAMS:
+                    current = [body.strip()]
+                    params.append((words[-1], " ".join(words[1:-1]), current))
+                elif words[0] == "type":
+                    types[words[1]] = body.strip()
+            elif fields:
+                if current is not None and stripped: current.append(stripped)
+            elif line: descriptions.append(line)
+        return descriptions, [
+            (name, types.get(name, spec), "\n".join(helps).strip()) for name, spec, helps in params]
+
+
+_doc_styles = [NumpyStyle(), SphinxStyle(), GoogleStyle()]
+
+# Memoized map of docstrings to their description lines and argument entries.
+_sections = {}
+
+
+def register_doc_style(style):
+    """Register a parser of a docstring style.
+
+    Registered parsers are tried before the built-in ones; the first parser
+    detecting a docstring parses it, and the Google style is the fallback.
+
+    Args:
+      style: a :class:`DocStyle` object.
+    """
+    _doc_styles.insert(0, style)
+    _sections.clear()
+
+
+def _split_doc(doc):
+    """Split a docstring into description lines and argument entries.
+
+    The style is detected once per docstring, and results are shared by
+    functions having the same docstring.
+    """
+    try:
+        return _sections[doc]
+    except KeyError:
+        pass
+
+    lines = doc.strip().splitlines()
+    for style in _doc_styles:
+        if style.detect(lines): break
+    res = _sections[doc] = style.parse(lines)
+    return res
+
+
+@_profiled("_parse_doc", _name_of)
+def _parse_doc(func):
+    """Parse a docstring.
+
+    Parse a docstring and extract three components; headline, description,
+    and map of arguments to help texts. Google, NumPy, and Sphinx styles are
+    detected automatically.
+
+    Args:
+      func: function object
+
+    Returns:
+      a dictionary.
+    """
+    import textwrap
+
+    doc = func.__doc__ if func.__doc__ is not None else ''
+    descriptions, entries = _split_doc(doc)
+
+    # infer headline
+    if len(descriptions) > 0: headline = descriptions[0]
+    else: headline = ''
+
+    # infer description
+    if len(descriptions) > 0: description = descriptions[0]
+    if len(descriptions) > 1: description += "\n\n" + textwrap.dedent("\n".join(descriptions[1:]))
+    if len(descriptions) == 0: description = ''
+
+    argmap = _parse_args(entries, func)
+    return dict(headline=headline, description=description, args=argmap)
+
+
+class DocCache(object):
+    """Persistent on-disk cache of parsed docstrings.
+
+    Results of :func:`_parse_doc` are pickled into ``directory``, one file per
+    function identified by its module path and qualified name. Each entry
+    records a hash of the docstring and the signature, and the classes type
+    names in the docstring referred to; it is parsed again when they change,
+    e.g. a converter is registered by :func:`register_type`. Once the directory grows beyond ``max_size`` bytes, the least
+    recently used entries are removed.
+
+    Args:
+      directory: where cache files are stored. If not given,
+        ``$XDG_CACHE_HOME/dsargparse`` (``~/.cache/dsargparse``) is used.
+      max_size: upper bound of the total size of cache files in bytes.
+      help: if True, help messages rendered by :class:`ArgumentParser` are
+        also stored, and reused while the parser is built the same way.
+    """
+
+    _FORMAT = 6
+    _SUFFIX = ".pickle"
+
+    def __init__(self, directory=None, max_size=4 * 1024 * 1024, help=False): # pylint: disable=redefined-builtin
+        if not directory:
+            base = os.environ.get("XDG_CACHE_HOME") or os.path.join(os.path.expanduser("~"), ".cache")
+            directory = os.path.join(base, "dsargparse")
+        self.directory = directory
+        self.max_size = max_size
+        self.help = help
+
+    @staticmethod
+    def _identify(func):
+        """Compute the file key and the source hash of a function."""
+        import hashlib
+
+        module = _module_of(func)
+        path = getattr(module, "__file__", None) or getattr(func, "__module__", None) or ""
+        qualname = getattr(func, "__qualname__", getattr(func, "__name__", ""))
+
+        code = getattr(func, "__code__", None)
+        if code is None: signature = ""
+        else:
+            signature = repr((
+                code.co_varnames[:code.co_argcount + code.co_kwonlyargcount],
+                getattr(func, "__defaults__", None), getattr(func, "__kwdefaults__", None),
+                getattr(func, "__annotations__", None)))
+
+        if os.path.isfile(path): path = os.path.abspath(path)
+
+        key = "{0}\0{1}".format(path, qualname)
+        styles = ",".join(style.name or type(style).__name__ for style in _doc_styles)
+        digest = "{0}\0{1}\0{2}\0{3}".format(DocCache._FORMAT, styles, func.__doc__ or "", signature)
+        return (hashlib.sha1(key.encode("utf-8")).hexdigest(),
+                hashlib.sha1(digest.encode("utf-8")).hexdigest())
+
+    @staticmethod
+    def _identify_help(parser, width):
+        """Compute the file key and the content hash of a help message of a parser."""
+        import hashlib
+
+        path = getattr(sys.modules.get("__main__"), "__file__", None) or ""
+        if os.path.isfile(path): path = os.path.abspath(path)
+        actions = [
+            (type(a).__name__, a.option_strings, a.dest, a.nargs, a.metavar, a.help, a.required,
+             repr(a.choices) if not isinstance(a, argparse._SubParsersAction) else None,
+             repr(a.default) if not isinstance(a, argparse._SubParsersAction) else None)
+            for a in parser._actions]
+        choices = [
+            [(c.dest, c.metavar, c.help) for c in a._choices_actions] for a in _subparsers_actions(parser)]
+        positions = dict((id(a), i) for i, a in enumerate(parser._actions))
+        groups = [
+            (g.title, g.description, [positions.get(id(a)) for a in g._group_actions])
+            for g in parser._action_groups + parser._mutually_exclusive_groups]
+        content = repr((
+            DocCache._FORMAT, width, parser.prog, parser.usage, parser.description, parser.epilog,
+            parser.formatter_class.__name__, parser.prefix_chars, actions, choices, groups))
+        key = "help\0{0}\0{1}".format(path, parser.prog)
+        return (hashlib.sha1(key.encode("utf-8")).hexdigest(),
+                hashlib.sha1(content.encode("utf-8")).hexdigest())
+
+    def _path(self, key):
+        return os.path.join(self.directory, key + self._SUFFIX)
+
+    def get(self, func):
+        """Return the cached information of a function, parsing it on a miss.
+
+        Args:
+          func: function or module object.
+
+        Returns:
+          a dictionary same as :func:`_parse_doc` returns.
+        """
+        global _resolving # pylint: disable=global-statement
+
+        key, digest = self._identify(func)
+        info = self.load(key, digest, func)
+        if info is None:
+            outer, _resolving = _resolving, []
+            try:
+                info = _parse_doc(func)
+            finally:
+                resolved, _resolving = _resolving, outer
+            self.store(key, digest, info, resolved)
+        return info
+
+    def load(self, key, digest, func=None):
+        """Load a cache entry, returning None if missing or stale.
+
+        If `func` is given, type names the entry resolved must still refer to
+        the same classes in the module defining it.
+        """
+        import pickle
+
+        path = self._path(key)
+        try:
+            with open(path, "rb") as fp:
+                stored_digest, info, resolved = pickle.load(fp)
+        except Exception: # pylint: disable=broad-except
+            return None
+        if stored_digest != digest: return None
+        if resolved and func is not None:
+            namespace = _namespace_of(func)
+            if any(_lookup_type(name, namespace) is not obj for name, obj in resolved): return None
+
+        try: os.utime(path, None)
+        except OSError: pass
+        return info
+
+    def store(self, key, digest, info, resolved=()):
+        """Store a cache entry; unpicklable entries are silently skipped."""
+        import pickle
+        import tempfile
+
+        try:
+            data = pickle.dumps((digest, info, list(resolved)), protocol=pickle.HIGHEST_PROTOCOL)
+        except Exception: # pylint: disable=broad-except
+            return
+        try:
+            if not os.path.isdir(self.directory): os.makedirs(self.directory)
+            fd, tmp = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+            with os.fdopen(fd, "wb") as fp:
+                fp.write(data)
+            os.replace(tmp, self._path(key))
+        except OSError:
+            return
+        self.evict()
+
+    def evict(self):
+        """Remove least recently used entries until the size limit is met."""
+        try:
+            entries = [
+                e for e in os.scandir(self.directory)
+                if e.is_file() and e.name.endswith(self._SUFFIX)]
+            stats = [(e.stat(), e.path) for e in entries]
+        except OSError:
+            return
+        total = sum(st.st_size for st, _ in stats)
+        for st, path in sorted(stats, key=lambda v: v[0].st_mtime):
+            if total <= self.max_size: break
+            try: os.remove(path)
+            except OSError: continue
+            total -= st.st_size
+
+    def clear(self):
+        """Remove all cache entries."""
+        max_size, self.max_size = self.max_size, -1
+        try: self.evict()
+        finally: self.max_size = max_size
+
+
+_doc_cache = None
+
+
+def enable_doc_cache(directory=None, max_size=4 * 1024 * 1024, help=False): # pylint: disable=redefined-builtin
+    """Enable the persistent docstring cache.
+
+    After calling this function, :class:`ArgumentParser` and ``add_parser``
+    reuse parsed docstrings stored in the cache directory. The cache is also
+    enabled at import when the environment variable ``DSARGPARSE_CACHE_DIR`` is set.
+
+    Args:
+      directory: where cache files are stored.
+      max_size: upper bound of the total size of cache files in bytes.
+      help: if True, rendered help messages are also stored and reused.
+
+    Returns:
+      the :class:`DocCache` instance now in use.
+    """
+    global _doc_cache # pylint: disable=global-statement
+    _doc_cache = DocCache(directory, max_size, help)
+    return _doc_cache
+
+
+def disable_doc_cache():
+    """Disable the persistent docstring cache."""
+    global _doc_cache # pylint: disable=global-statement
+    _doc_cache = None
+
+
+def _clear_caches():
+    """Drop in-memory caches of introspection and docstring parsing, e.g. to measure cold runs."""
+    global _signatures, _annotations, _classes, _formatted # pylint: disable=global-statement
+    _signatures = _annotations = _classes = _formatted = None
+    _converters.clear()
+    _sections.clear()
+
+
+def _module_of(obj):
+    """Return the module an object is defined in, or the object if it is a module."""
+    if isinstance(obj, type(sys)): return obj
+    return sys.modules.get(getattr(obj, "__module__", None))
+
+
+def _get_doc(func):
+    """Parse a docstring, using the persistent cache if it is enabled."""
+    if _doc_cache is None: return _parse_doc(func)
+    return _doc_cache.get(func)
+
+
+if os.environ.get("DSARGPARSE_CACHE_DIR"):
+    enable_doc_cache(os.environ["DSARGPARSE_CACHE_DIR"])
+
+
+def _headline(doc):
+    """Extract the headline of a docstring without parsing the rest of it.
+
+    The first line is the headline unless it is a section header, as
+    :class:`GoogleStyle` decides, or a Sphinx field.
+    """
+    lines = doc.strip().splitlines()
+    if not lines or lines[0].startswith(":"): return ''
+    head = lines[0].partition(":")[0] + ":" if ":" in lines[0] else None
+    if head in GoogleStyle._ARGS or head in GoogleStyle._OTHERS: return ''
+    return lines[0]
+
+
+class _Deferred(object):
+    """Recorder of method calls and attribute assignments.
+
+    Each recorded call returns another recorder owned by the same root, so
+    that assignments to returned objects such as actions are replayed too.
+    Reading an attribute of a returned recorder builds the real object by
+    realizing its owner, and the recorder forwards everything to it afterwards.
+    """
+
+    def __init__(self, owner=None):
+        object.__setattr__(self, "_records", [])
+        object.__setattr__(self, "_owner", owner)
+        object.__setattr__(self, "_target", None)
+
+    def __getattr__(self, name):
+        if name.startswith("__") or (self._owner is None and name.startswith("_")): raise AttributeError(name)
+        if self._owner is not None:
+            self._owner._realize()
+            return getattr(self._target, name)
+
+        def _(*args, **kwargs):
+            """Record a method call."""
+            res = _Deferred(self)
+            self._records.append((name, args, kwargs, res))
+            return res
+        return _
+
+    def __setattr__(self, name, value):
+        if self._target is not None: setattr(self._target, name, value)
+        else: self._records.append((name, None, value, None))
+
+    def _replay(self, target):
+        """Replay recorded operations on a target object."""
+        object.__setattr__(self, "_target", target)
+        for name, args, kwargs, res in self._records:
+            if args is None: setattr(target, name, kwargs)
+            else: res._replay(getattr(target, name)(*args, **kwargs))
+        return target
+
+
+class _PendingParser(_Deferred):
+    """Placeholder of a sub command parser which has not been built yet.
+
+    Methods of `cls` called on this object are recorded and replayed on the
+    real parser once it is built. Reading any other attribute builds the real
+    parser, and the placeholder forwards everything to it afterwards.
+    """
+
+    def __init__(self, build, kwargs, func=None, documented=None, cls=None):
+        super(_PendingParser, self).__init__()
+        object.__setattr__(self, "_parser", None)
+        object.__setattr__(self, "_build", build)
+        object.__setattr__(self, "_kwargs", kwargs)
+        object.__setattr__(self, "_func", func)
+        object.__setattr__(self, "_documented", func if documented is None else documented)
+        object.__setattr__(self, "_class", cls if cls is not None else ArgumentParser)
+
+    def __getattr__(self, name):
+        if name.startswith("__"): raise AttributeError(name)
+        if self._parser is None and not name.startswith("_") and callable(getattr(self._class, name, None)):
+            return super(_PendingParser, self).__getattr__(name)
+        return getattr(self._realize(), name)
+
+    def __setattr__(self, name, value):
+        if self._parser is None: super(_PendingParser, self).__setattr__(name, value)
+        else: setattr(self._parser, name, value)
+
+    def _realize(self):
+        """Build the real parser and replay recorded calls, only once."""
+        if self._parser is None:
+            object.__setattr__(self, "_parser", self._replay(
+                self._build(self._documented, self._func, **self._kwargs)))
+        return self._parser
+
+
+_HELP_OPTIONS = ("-h", "--help", "--version")
+
+# Options handled by parse_and_run before parsing, and their destinations.
+_ENTRY_OPTIONS = (("--batch", "dsargparse_batch"), ("--serve", "dsargparse_serve"))
+
+
+def _help_requested(argv):
+    """Check a help or version message is requested in given arguments."""
+    for arg in argv:
+        if arg == "--": break
+        if arg in _HELP_OPTIONS: return True
+    return False
+
+
+class _LazyParserMap(dict):
+    """Map of sub command names to parsers which builds pending parsers on access."""
+
+    def __getitem__(self, name):
+        parser = dict.__getitem__(self, name)
+        if isinstance(parser, _PendingParser):
+            pending, parser = parser, parser._realize()
+            for key in [k for k, v in dict.items(self) if v is pending]:
+                dict.__setitem__(self, key, parser)
+        return parser
+
+    def get(self, name, default=None):
+        return self[name] if name in self else default
+
+    def values(self):
+        return [self[k] for k in self]
+
+    def items(self):
+        return [(k, self[k]) for k in self]
+
+
+def _subparsers_actions(parser):
+    """Return sub command actions of a parser."""
+    return [a for a in parser._actions if isinstance(a, argparse._SubParsersAction)]
+
+
+# Memoized map of actions to their formatted help texts keyed by layouts.
+_formatted = None
+
+
+class CachedHelpFormatter(argparse.RawTextHelpFormatter):
+    """Help formatter which memoizes formatted actions.
+
+    It formats help messages as ``argparse.RawTextHelpFormatter`` does, but
+    the text of each action, e.g. the list of sub commands, is formatted once
+    per layout and reused by later help messages. Entries are keyed by actions,
+    the program name, and every attribute of actions and their sub actions
+    which appears in help messages, so changing any of them, e.g. by
+    ``set_defaults``, invalidates them.
+    """
+
+    def _format_action(self, action):
+        import weakref
+
+        global _formatted # pylint: disable=global-statement
+        if _formatted is None: _formatted = weakref.WeakKeyDictionary()
+        key = (
+            type(self), self._prog, self._width, self._max_help_position, self._action_max_length,
+            self._current_indent, _action_key(action),
+            tuple(_action_key(a) for a in getattr(action, "_get_subactions", list)()))
+        try:
+            return _formatted[action][key]
+        except KeyError:
+            pass
+        res = super(CachedHelpFormatter, self)._format_action(action)
+        _formatted.setdefault(action, {})[key] = res
+        return res
+
+
+def _action_key(action):
+    """Return a hashable summary of the attributes of an action shown in help messages."""
+    if isinstance(action, argparse._SubParsersAction): choices = default = None
+    else: choices, default = repr(action.choices), repr(action.default)
+    return (
+        tuple(action.option_strings), action.dest, action.nargs, action.metavar, action.help,
+        action.required, choices, default)
+
+
+def _walk_parsers(parser, build=True):
+    """Iterate over parsers in a parser tree.
+
+    Args:
+      parser: root parser.
+      build: if False, pending parsers are yielded without building them and
+        their children are not visited.
+
+    Yields:
+      parsers including the root, each of which appears once even if it has aliases.
+    """
+    yield parser
+    if isinstance(parser, _PendingParser): return
+    for action in _subparsers_actions(parser):
+        parsers = action._name_parser_map.values() if build else dict.values(action._name_parser_map)
+        seen = set()
+        for child in parsers:
+            if id(child) in seen: continue
+            seen.add(id(child))
+            for p in _walk_parsers(child, build): yield p
+
+
+def _source_files(parser):
+    """Return paths of the main script and modules defining commands of a parser tree."""
+    modules = [_module_of(f) for f in _command_functions(parser)] + [sys.modules.get("__main__")]
+    return set(getattr(m, "__file__", None) for m in modules) - set([None])
+
+
+def _command_functions(parser):
+    """Return functions of commands registered in a parser tree without building pending parsers."""
+    res = []
+    for p in _walk_parsers(parser, build=False):
+        func = p._func if isinstance(p, _PendingParser) else p._defaults.get("cmd")
+        if func is not None and func not in res: res.append(func)
+    return res
+
+
+_classes = None
+
+
+def _class_commands(cls):
+    """Introspect a class registered as a command group.
+
+    Public methods are collected in one pass over the dictionaries of the class
+    and its bases; methods of subclasses override ones of bases. Every named
+    constructor argument is an option, documented in the docstring of
+    ``__init__`` or, if it has no ``Args:`` section, of the class defining
+    ``__init__``. The result is computed once per class and shared until the
+    class is collected.
+
+    Args:
+      cls: class object.
+
+    Returns:
+      a tuple of names of constructor arguments, a map of constructor argument
+      names to ArgSpec objects, and a list of tuples of a method name, its
+      function, and whether it is a static or class method.
+    """
+    import inspect
+    import weakref
+
+    global _classes # pylint: disable=global-statement
+    if _classes is None: _classes = weakref.WeakKeyDictionary()
+    try:
+        return _classes[cls]
+    except KeyError:
+        pass
+
+    methods, seen = [], set()
+    for klass in cls.__mro__:
+        if klass is object: continue
+        for name, value in vars(klass).items():
+            if name in seen or name.startswith("_"): continue
+            seen.add(name)
+            func = getattr(value, "__func__", value)
+            if hasattr(func, "__code__"):
+                methods.append((name, func, isinstance(value, (staticmethod, classmethod))))
+
+    names, argmap = (), {}
+    if cls.__init__ is not object.__init__:
+        params = inspect.signature(cls).parameters.values()
+        names = tuple(p.name for p in params if p.kind not in (p.VAR_POSITIONAL, p.VAR_KEYWORD))
+        owner = next(klass for klass in cls.__mro__ if "__init__" in vars(klass))
+        documented = _get_doc(owner.__init__)["args"] or _get_doc(owner)["args"]
+        others = _parse_args([(key, "", "") for key in names if key not in documented], owner.__init__)
+        argmap = dict((key, documented[key] if key in documented else others[key]) for key in names)
+
+    res = _classes[cls] = (names, argmap, methods)
+    return res
+
+
+class _MethodCommand(object):
+    """Command which runs a method of a new instance of a class.
+
+    Keyword arguments the constructor takes are passed to it, and the others
+    are passed to the method. Static and class methods are called without
+    making an instance.
+
+    Args:
+      cls: class object.
+      name: name of the method.
+    """
+
+    def __init__(self, cls, name):
+        self.cls = cls
+        self.__name__ = name
+        self.__qualname__ = "{0}.{1}".format(cls.__qualname__, name)
+        self.__module__ = cls.__module__
+        self.__doc__ = getattr(cls, name).__doc__
+
+    def __call__(self, **kwargs):
+        names, _, methods = _class_commands(self.cls)
+        if any(name == self.__name__ and unbound for name, _, unbound in methods):
+            return getattr(self.cls, self.__name__)(**kwargs)
+        instance = self.cls(**dict((key, kwargs.pop(key)) for key in names if key in kwargs))
+        return getattr(instance, self.__name__)(**kwargs)
+
+    def __reduce__(self):
+        return _MethodCommand, (self.cls, self.__name__)
+
+    def __eq__(self, other):
+        return isinstance(other, _MethodCommand) and (self.cls, self.__name__) == (other.cls, other.__name__)
+
+    def __ne__(self, other):
+        return not self == other
+
+    def __hash__(self):
+        return hash((self.cls, self.__name__))
+
+    def __repr__(self):
+        return "<command {0}.{1}>".format(self.__module__, self.__qualname__)
+
+
+class _SubparsersWrapper(object):
+    """Wrapper of the action object made by argparse.ArgumentParser.add_subparsers.
+
+    To create an instance, the constructor takes a reference to an instance of
+    the action class.
+    """
+
+    def __init__(self, delegate, lazy=False):
+        self._delegate = delegate
+        self._parser_class = delegate._parser_class
+        self._lazy = _help_requested(sys.argv[1:]) if lazy is None else lazy
+
+    def add_parser(self, func=None, name=None, add_arguments_auto=False, lazy=None, **kwargs):
+        """Add parser.
+
+        This method makes a new sub command parser. It takes same arguments
+        as add_parser() of the action class made by
+        argparse.ArgumentParser.add_subparsers.
+
+        In addition to, it takes one positional argument `func`, which is the
+        function implements process of this sub command. The `func` will be used
+        to determine the name, help, and description of this sub command. The
+        function `func` will also be set as a default value of `cmd` attribute.
+
+        If you want to choose name of this sub command, use keyword argument
+        `name`.
+
+        In lazy mode, only the name and the headline of `func` are registered,
+        and the docstring is parsed when the sub command is actually selected.
+        The returned object then records method calls such as ``add_argument``
+        and replays them on the real parser. Reading any other attribute, such
+        as ``prog``, or an attribute of a returned object, such as ``dest`` of
+        an action, builds the real parser at once.
+
+        Args:
+          func: function implements the process of this command.
+          name: name of this command. If not give, the function name is used.
+          add_arguments_auto: whether this function should automatically add arguments
+          lazy: whether the parser is built on demand. If not given, the mode
+            chosen in ``add_subparsers`` is used.
+
+        Returns:
+          new ArgumentParser object, or a placeholder of it in lazy mode.
+
+        Raises:
+          ValueError: if the given function does not have docstrings.
+        """
+        if func:
+            if not func.__doc__:
+                raise ValueError(
+                    "No docstrings given in {0}".format(func.__name__))
+
+            if not name:
+                name = func.__name__ if hasattr(func, "__name__") else func
+
+            return self._add_command(func, func, name, add_arguments_auto, lazy, None, **kwargs)
+
+        return self._delegate.add_parser(name, **kwargs)
+
+    def add_commands(self, cls, excludes=None, add_arguments_auto=True, lazy=None, **kwargs):
+        """Add sub commands running public methods of a class.
+
+        Each public method of `cls` becomes a sub command named after the
+        method, which creates an instance of `cls` and calls the method.
+        Named arguments of the constructor are added to every such sub command
+        as options in an argument group, required if they have no defaults.
+        Static and class methods are called on the class, and take no
+        constructor options.
+
+        Introspection of the class is done once and shared by every call.
+
+        Args:
+          cls: class implements the commands.
+          excludes: list of method names which shouldn't be added.
+          add_arguments_auto: whether arguments of each method should be added automatically.
+          lazy: whether the parsers are built on demand. If not given, the mode
+            chosen in ``add_subparsers`` is used.
+
+        Keyword Args:
+          same keywords arguments as ``add_parser``, which are given to every sub command.
+
+        Returns:
+          list of new ArgumentParser objects, or placeholders of them in lazy mode.
+
+        Raises:
+          ValueError: if a method does not have docstrings.
+        """
+        _, argmap, methods = _class_commands(cls)
+        group = ("{0} options".format(cls.__name__), argmap) if argmap else None
+        res = []
+        for name, func, unbound in methods:
+            if excludes and name in excludes: continue
+            if not func.__doc__:
+                raise ValueError(
+                    "No docstrings given in {0}.{1}".format(cls.__name__, name))
+            res.append(self._add_command(
+                _MethodCommand(cls, name), func, name, add_arguments_auto, lazy,
+                None if unbound else group, **dict(kwargs)))
+        return res
+
+    def _add_command(self, cmd, func, name, add_arguments_auto, lazy, group, **kwargs):
+        """Add a sub command running `cmd` and documented by the docstring of `func`."""
+        if _FORMAT_CLASS not in kwargs or not kwargs[_FORMAT_CLASS]:
+            kwargs[_FORMAT_CLASS] = CachedHelpFormatter
+
+        if lazy is None: lazy = self._lazy
+        if lazy:
+            if _HELP not in kwargs or not kwargs[_HELP]:
+                kwargs[_HELP] = _headline(func.__doc__)
+            if not isinstance(self._delegate._name_parser_map, _LazyParserMap):
+                self._delegate._name_parser_map = _LazyParserMap(self._delegate._name_parser_map)
+                self._delegate.choices = self._delegate._name_parser_map
+
+            def build(documented, cmd, **kw):
+                """Build the parser of this command."""
+                return self._build(documented, add_arguments_auto, None, cmd, group, **kw)
+            return self._add(
+                lambda **kw: _PendingParser(build, kw, cmd, func, self._parser_class), name, **kwargs)
+
+        info = _get_doc(func)
+        if _HELP not in kwargs or not kwargs[_HELP]:
+            kwargs[_HELP] = info["headline"]
+        return self._add(
+            lambda **kw: self._build(func, add_arguments_auto, info, cmd, group, **kw), name, **kwargs)
+
+    def _add(self, factory, name, **kwargs):
+        """Call add_parser of the delegate with a replaced parser factory."""
+        self._delegate._parser_class = factory
+        try:
+            return self._delegate.add_parser(name, **kwargs)
+        finally:
+            self._delegate._parser_class = self._parser_class
+
+    def _build(self, func, add_arguments_auto, info, cmd=None, group=None, **kwargs):
+        """Build a parser of a sub command from the docstring of its function.
+
+        The command defaults to `func`. If `group` is given, it is a pair of a
+        title and a map of option names to ArgSpec objects added as an argument group.
+        """
+        if info is None: info = _get_doc(func)
+        if _DESCRIPTION not in kwargs or not kwargs[_DESCRIPTION]:
+            kwargs[_DESCRIPTION] = info["description"]
+
+        res = self._parser_class(argmap=info["args"], **kwargs)
+        res._info = info
+        res.set_defaults(cmd=func if cmd is None else cmd)
+        if add_arguments_auto: res.add_arguments_auto()
+        if group:
+            title, argmap = group
+            options = res.add_argument_group(title)
+            for key, arginfo in argmap.items():
+                options.add_argument("--" + key, **dict((k, v) for k, v in arginfo.items() if v is not None))
+        return res
 
-    if args is None: return 'invalid', None
-    if defaults is None: return 'invalid', None
+    def __repr__(self):
+        return self._delegate.__repr__()
 
-    args = args[-len(defaults):]
-    args = dict(zip(args, defaults))
-    if argname in args: status, default = 'valid', args[argname]
-    else: status, default = 'invalid', None
-    return status, default
 
+def _is_coroutine(obj):
+    """Check an object is a coroutine, without importing inspect for others."""
+    if not hasattr(obj, "__await__"): return False
+    import inspect
+    return inspect.iscoroutine(obj)
 
-def _parse_args(args_desc, func):
-    '''Parse an Args description
 
-    Parse given args description and return in dictionary form.
+def _run_coroutine(coro, loop_factory=None):
+    """Run a coroutine until it completes.
 
     Args:
-        args_desc: description of args.
-        func: function which holds args this func analyzes
+      coro: coroutine object.
+      loop_factory: function which returns a new event loop. If not given,
+        ``asyncio.run`` is used.
 
     Returns:
-        a dictionary.
-    '''
-    def extract_key(line):
-        '''exctract a key from a line'''
-        key = re.sub(r'(^[^\s]+?)\s*(\(\s*([^:]+?)\s*\))?\s*:((.|\n)*)$', r'\1', line).strip()
-        return key
+      the value the coroutine returns.
+    """
+    import asyncio
 
-    def extract_type_nargs(line):
-        type_ = re.sub(r'(^[^\s]+?)\s*(\(\s*([^:]+?)\s*\))?\s*:((.|\n)*)$', r'\3', line).strip()
-        if type_ == '': return None, None
-        if type_.count('[') > 1: return None, None  # can't deal with it
+    if loop_factory is None: return asyncio.run(coro)
+    loop = loop_factory()
+    try:
+        asyncio.set_event_loop(loop)
+        return loop.run_until_complete(coro)
+    finally:
+        asyncio.set_event_loop(None)
+        loop.close()
 
-        outer_type = re.sub(r'^([^\s]+?)(\s*\[\s*([^\s]+)\s*\]\s*)?$', r'\1', type_)
-        inner_type = re.sub(r'^([^\s]+?)(\s*\[\s*([^\s]+)\s*\]\s*)?$', r'\3', type_)
 
-        if inner_type == '': inner_type = None
+class _StreamRouter(object):
+    """Proxy of a standard stream which routes writes to buffers of the current thread."""
 
-        if outer_type in ('list', 'tuple'):
-            type_, nargs = inner_type, '+'
-        else: nargs = None
-        return eval(type_), nargs
+    _local = None
 
-    def extract_value(line):
-        '''exctract a key from a line'''
-        value = re.sub(r'(^[^\s]+?)\s*(\(\s*([^:]+?)\s*\))?\s*:((.|\n)*)$', r'\4', line).strip()
-        return value
+    def __init__(self, name, stream):
+        self._name = name
+        self._stream = stream
 
-    def guess_type_nargs(default):
-        if default is None:
-            return None, None
-        elif isinstance(default, (list, tuple)):
-            nargs = '+'
-            if default: type_ = type(default[0])
-            else: type_ = None
-        else: nargs, type_ = None, type(default)
-        return type_, nargs
+    def _target(self):
+        buffers = getattr(_StreamRouter._local, "buffers", None)
+        return buffers[self._name] if buffers else self._stream
 
-    argmap = {}
+    def write(self, data):
+        return self._target().write(data)
 
-    args = list(filter(bool, args_desc.splitlines()))
-    for idx, arg_line in enumerate(args):
-        if _starts_with_white(arg_line): continue
-        assert ':' in arg_line
-        additional_lines = itertools.takewhile(_starts_with_white, args[idx + 1:])
-        if additional_lines: arg_line += '\n' + '\n'.join(additional_lines)
+    def __getattr__(self, name):
+        return getattr(self._target(), name)
 
-        key, value = extract_key(arg_line), extract_value(arg_line)
-        type_, nargs = extract_type_nargs(arg_line)
-        default_status, default = extract_default_from_signature(key, func)
-        if (type_ is None) and (nargs is None): type_, nargs = guess_type_nargs(default)
-        if (type_ is bool) and (nargs is None): default, type_, action = False, None, 'store_true'
-        else: action = None
 
-        argmap[key] = {_HELP: value, _TYPE: type_, _NARGS: nargs, _ACTION: action}
-        if default_status == 'valid': argmap[key][_DEFAULT] = default
-        argmap[key][_REQUIRED] = False if _DEFAULT in argmap[key] else True
-    return argmap
+class _RoutedStreams(object):
+    """Context manager which installs stream routers to the standard streams.
+
+    Routers are shared by nested and concurrent users, and removed when the
+    last user exits.
+    """
 
+    _lock = None
+    _users = 0
 
-def _starts_with_white(line):
-    '''check if starts with a white
+    def __enter__(self):
+        import threading
+
+        if _RoutedStreams._lock is None: _RoutedStreams._lock = threading.Lock()
+        with _RoutedStreams._lock:
+            if _StreamRouter._local is None: _StreamRouter._local = threading.local()
+            if _RoutedStreams._users == 0:
+                for name in ("stdout", "stderr"):
+                    setattr(sys, name, _StreamRouter(name, getattr(sys, name)))
+            _RoutedStreams._users += 1
+        return self
+
+    def __exit__(self, *args):
+        with _RoutedStreams._lock:
+            _RoutedStreams._users -= 1
+            if _RoutedStreams._users == 0:
+                for name in ("stdout", "stderr"):
+                    stream = getattr(sys, name)
+                    if isinstance(stream, _StreamRouter): setattr(sys, name, stream._stream)
+
+
+def _captured_call(func, loop_factory=None):
+    """Call a function capturing its outputs, exit status, and errors.
+
+    Stream routers must be installed by :class:`_RoutedStreams`.
 
     Args:
-        line: a string line
+      func: function which takes no arguments.
+      loop_factory: function which returns a new event loop to run a
+        coroutine the function returns.
 
     Returns:
-        bool
-    '''
-    return bool(re.match(r'^\s+.*$', line))
+      a dictionary which has ``status``, ``stdout``, ``stderr``, and
+      ``result`` or ``error``.
+    """
+    import io
+
+    record = {}
+    buffers = dict(stdout=io.StringIO(), stderr=io.StringIO())
+    _StreamRouter._local.buffers = buffers
+    try:
+        res = func()
+        if _is_coroutine(res): res = _run_coroutine(res, loop_factory)
+    except SystemExit as e:
+        if e.code is None or isinstance(e.code, int): record["status"] = e.code or 0
+        else: record["status"], record["error"] = 1, str(e.code)
+    except Exception as e: # pylint: disable=broad-except
+        record["status"], record["error"] = 1, "{0}: {1}".format(type(e).__name__, e)
+    else:
+        record["status"] = res if isinstance(res, int) and not isinstance(res, bool) else 0
+        record["result"] = res
+    finally:
+        _StreamRouter._local.buffers = None
+    record["stdout"], record["stderr"] = buffers["stdout"].getvalue(), buffers["stderr"].getvalue()
+    return record
+
+
+def _merge_records(record, other):
+    """Merge a record of running a command into the one of parsing its arguments."""
+    for key in ("stdout", "stderr"):
+        other[key] = record[key] + other[key]
+    record.update(other)
+    return record
+
+
+def _finish_record(record):
+    """Wait for a record running in a pool, if needed."""
+    if isinstance(record, tuple):
+        record, future = record
+        try:
+            _merge_records(record, future.result())
+        except Exception as e: # pylint: disable=broad-except
+            record["status"], record["error"] = 1, "{0}: {1}".format(type(e).__name__, e)
+    return record
+
+
+def _resolve(module, qualname):
+    """Return an object from its module and qualified name."""
+    import importlib
+
+    obj = importlib.import_module(module)
+    for name in qualname.split("."):
+        obj = getattr(obj, name)
+    return obj
+
+
+def _run_in_process(cmd, kwargs, loop_factory=None):
+    """Run a command in a worker process.
+
+    The command is pickled by reference, i.e. functions are resolved by their
+    module and qualified name in the worker. Results which cannot be pickled
+    are replaced with their ``repr``.
+    """
+    import pickle
 
+    with _RoutedStreams():
+        record = _captured_call(lambda: ArgumentParser._dispatch(cmd, **kwargs), loop_factory)
+    try:
+        pickle.dumps(record.get("result"))
+    except Exception: # pylint: disable=broad-except
+        record["result"] = repr(record["result"])
+    return record
 
-def _parse_doc(func):
-    """Parse a docstring.
 
-    Parse a docstring and extract three components; headline, description,
-    and map of arguments to help texts.
+def client(path, argv=None, stdin=None):
+    """Run a command on a server started by :meth:`ArgumentParser.serve`.
+
+    The arguments, environment variables, working directory, and optionally
+    the standard input are sent to the server, and the standard output and
+    error of the command are written to those of this process.
 
     Args:
-      func: function object
+      path: path to the socket of the server.
+      argv: list of arguments. Defaults to ``sys.argv[1:]``.
+      stdin: string sent as the standard input, or True to read and send the
+        standard input of this process until EOF. If not given, the command
+        reads an empty standard input.
 
     Returns:
-      a dictionary.
+      the exit status of the command.
     """
-    doc = func.__doc__ if func.__doc__ is not None else ''
-    lines = doc.strip().splitlines()
-    descriptions = list(filter(bool, itertools.takewhile(_checker(_KEYWORDS), lines)))
+    import json
+    import socket
 
-    # infer headline
-    if len(descriptions) > 0: headline = descriptions[0]
-    else: headline = ''
+    if argv is None: argv = sys.argv[1:]
+    if stdin is True: stdin = sys.stdin.read() if sys.stdin is not None else ""
+    elif stdin is None: stdin = ""
+    request = dict(argv=list(argv), env=dict(os.environ), cwd=os.getcwd(), stdin=stdin)
 
-    # infer description
-    if len(descriptions) > 0: description = descriptions[0]
-    if len(descriptions) > 1: description += "\n\n" + textwrap.dedent("\n".join(descriptions[1:]))
-    if len(descriptions) == 0: description = ''
+    sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        sock.connect(path)
+        sock.sendall((json.dumps(request) + "\n").encode("utf-8"))
+        with sock.makefile("rb") as fp:
+            record = json.loads(fp.readline().decode("utf-8"))
+    finally:
+        sock.close()
 
-    # infer args
-    args = list(filter(bool, itertools.takewhile(
-        _checker(_KEYWORDS_OTHERS),
-        itertools.dropwhile(_checker(_KEYWORDS_ARGS), lines))))
+    sys.stdout.write(record.get("stdout", ""))
+    sys.stderr.write(record.get("stderr", ""))
+    if record.get("error"): sys.stderr.write(record["error"] + "\n")
+    return record.get("status", 1)
 
-    argmap = _parse_args(textwrap.dedent('\n'.join(args[1:])), func)
-    return dict(headline=headline, description=description, args=argmap)
 
+class _Stream(object):
+    """Iterator over values of an argument which reads and converts them on demand.
 
-class _SubparsersWrapper(object):
-    """Wrapper of the action object made by argparse.ArgumentParser.add_subparsers.
+    A value ``@path`` is replaced with lines of the file, where ``path`` can be
+    a glob pattern; files matching it are read in sorted order. A value ``-``
+    (or ``@-``) is replaced with lines of the standard input. Empty lines are
+    skipped. Other values are used as they are.
 
-    To create an instance, the constructor takes a reference to an instance of
-    the action class.
+    Args:
+      values: strings given in the command line.
+      convert: function which converts each value, e.g. ``int``.
     """
 
-    def __init__(self, delegate):
-        self._delegate = delegate
+    def __init__(self, values, convert=None):
+        self._values = values
+        self._convert = convert
+        self._iter = None
 
-    def add_parser(self, func=None, name=None, add_arguments_auto=False, **kwargs):
-        """Add parser.
+    def __iter__(self):
+        return self
 
-        This method makes a new sub command parser. It takes same arguments
-        as add_parser() of the action class made by
-        argparse.ArgumentParser.add_subparsers.
+    def __next__(self):
+        if self._iter is None: self._iter = self._generate()
+        return next(self._iter)
 
-        In addition to, it takes one positional argument `func`, which is the
-        function implements process of this sub command. The `func` will be used
-        to determine the name, help, and description of this sub command. The
-        function `func` will also be set as a default value of `cmd` attribute.
+    def _generate(self):
+        for value in self._values:
+            if value in ("-", "@-"): items = self._lines(sys.stdin)
+            elif value.startswith("@"): items = self._files(value[1:])
+            else: items = (value,)
+            for item in items:
+                yield item if self._convert is None else self._convert(item)
 
-        If you want to choose name of this sub command, use keyword argument
-        `name`.
+    def _files(self, pattern):
+        import glob
 
-        Args:
-          func: function implements the process of this command.
-          name: name of this command. If not give, the function name is used.
-          add_arguments_auto: whether this function should automatically add arguments
+        for path in sorted(glob.glob(pattern)) or [pattern]:
+            with open(path) as fp:
+                for line in self._lines(fp): yield line
 
-        Returns:
-          new ArgumentParser object.
+    @staticmethod
+    def _lines(fp):
+        for line in fp:
+            line = line.strip()
+            if line: yield line
 
-        Raises:
-          ValueError: if the given function does not have docstrings.
-        """
-        if func:
-            if not func.__doc__:
-                raise ValueError(
-                    "No docstrings given in {0}".format(func.__name__))
+    def __reduce__(self):
+        return _Stream, (self._values, self._convert)
 
-            info = _parse_doc(func)
-            if _HELP not in kwargs or not kwargs[_HELP]:
-                kwargs[_HELP] = info["headline"]
-            if _DESCRIPTION not in kwargs or not kwargs[_DESCRIPTION]:
-                kwargs[_DESCRIPTION] = info["description"]
-            if _FORMAT_CLASS not in kwargs or not kwargs[_FORMAT_CLASS]:
-                kwargs[_FORMAT_CLASS] = argparse.RawTextHelpFormatter
+    def __repr__(self):
+        return "_Stream({0!r}, {1!r})".format(self._values, self._convert)
 
-            if not name:
-                name = func.__name__ if hasattr(func, "__name__") else func
 
-            res = self._delegate.add_parser(name, argmap=info["args"], **kwargs)
-            res.set_defaults(cmd=func)
-            if add_arguments_auto: res.add_arguments_auto()
+class _StreamAction(argparse.Action):
+    """Action which stores a :class:`_Stream` instead of a list of converted values.
 
-        else:
-            res = self._delegate.add_parser(name, **kwargs)
+    Args:
+      convert: function which converts each value; it replaces ``type``
+        because values are converted when they are read.
+    """
 
-        return res
+    def __init__(self, option_strings, dest, convert=None, **kwargs):
+        super(_StreamAction, self).__init__(option_strings, dest, **kwargs)
+        self.convert = convert
 
-    def __repr__(self):
-        return self._delegate.__repr__()
+    def __call__(self, parser, namespace, values, option_string=None):
+        setattr(namespace, self.dest, _Stream(values, self.convert))
+
+
+# Memoized map of config file paths to their modification times and contents.
+_configs = {}
+
+
+def _load_config(path):
+    """Load a TOML, JSON, or INI config file.
+
+    A file is parsed once and reused until its modification time or size
+    changes. A missing file is treated as an empty one.
+
+    Args:
+      path: path to the config file. The format is chosen by its extension;
+        ``.toml``, ``.json``, and others as INI.
+
+    Returns:
+      a dictionary. Sections of INI files are dictionaries, and keys in the
+      ``DEFAULT`` section are also top-level keys.
+    """
+    path = os.path.expanduser(path)
+    try:
+        st = os.stat(path)
+    except OSError:
+        return {}
+    stamp = (st.st_mtime_ns, st.st_size)
+    cached = _configs.get(path)
+    if cached is not None and cached[0] == stamp: return cached[1]
+
+    ext = os.path.splitext(path)[1].lower()
+    if ext == ".toml":
+        try: import tomllib
+        except ImportError: import tomli as tomllib # pylint: disable=import-error
+        with open(path, "rb") as fp:
+            data = tomllib.load(fp)
+    elif ext == ".json":
+        import json
+        with open(path) as fp:
+            data = json.load(fp)
+    else:
+        import configparser
+        config = configparser.ConfigParser(interpolation=None)
+        config.read(path)
+        data = dict(config.defaults())
+        data.update((name, dict(config.items(name))) for name in config.sections())
+
+    _configs[path] = (stamp, data)
+    return data
 
 
 class ArgumentParser(argparse.ArgumentParser):
@@ -257,22 +1982,55 @@ class ArgumentParser(argparse.ArgumentParser):
     a new instance. Additionally, it has a positional argument ``main``,
     which takes the main function of the script ``dsargparse`` library called.
     From the main function, it extracts doctstings to set command descriptions.
+
+    The keyword argument ``profile`` enables profiling of dsargparse; give True
+    to print a report to the standard error at exit, or a path to write it as JSON.
+    The keyword argument ``batch`` adds ``--batch FILE`` option which runs
+    commands listed in the file by :meth:`parse_and_run_batch`, and ``server``
+    adds ``--serve SOCKET`` option which starts :meth:`serve`. These options
+    are handled by :meth:`parse_and_run` and must be the first argument.
     """
 
     def __init__(self, main=None, argmap=None, *args, **kwargs):
+        batch = kwargs.pop("batch", False)
+        server = kwargs.pop("server", False)
+        profile = kwargs.pop("profile", False)
+        if profile and _profiler is None:
+            enable_profile(profile if isinstance(profile, str) else None)
         if main:
             if _DESCRIPTION not in kwargs or not kwargs[_DESCRIPTION]:
-                info = _parse_doc(inspect.getmodule(main))
+                info = _get_doc(_module_of(main))
                 kwargs[_DESCRIPTION] = info[_DESCRIPTION]
             if _FORMAT_CLASS not in kwargs or not kwargs[_FORMAT_CLASS]:
-                kwargs[_FORMAT_CLASS] = argparse.RawTextHelpFormatter
+                kwargs[_FORMAT_CLASS] = CachedHelpFormatter
         self.__argmap = argmap if argmap else {}
+        self.__argindex = {key.replace("-", "_"): value for key, value in self.__argmap.items()}
+        self._info = None
+        self._derived = []
+        self._autos = []
 
         super(ArgumentParser, self).__init__(*args, **kwargs)
-
-    def add_subparsers(self, **kwargs):
+        self._batch = batch
+        if batch:
+            self.add_argument(
+                "--batch", metavar="FILE", dest=_ENTRY_OPTIONS[0][1], default=argparse.SUPPRESS,
+                help="run commands listed in FILE, one per line ('-' for stdin),\n"
+                     "and write results as JSON lines.")
+        self._server = server
+        if server:
+            self.add_argument(
+                "--serve", metavar="SOCKET", dest=_ENTRY_OPTIONS[1][1], default=argparse.SUPPRESS,
+                help="serve commands to clients connecting to the unix domain SOCKET.")
+        self._layers = []
+
+    def add_subparsers(self, lazy=None, **kwargs):
         """Add subparsers.
 
+        Args:
+          lazy: if True, sub command parsers are built only when they are selected.
+            If None, they are built lazily only when the command line requests
+            a help or version message.
+
         Keyword Args:
           same keywords arguments as ``argparse.ArgumentParser.add_subparsers``.
 
@@ -280,8 +2038,9 @@ class ArgumentParser(argparse.ArgumentParser):
           an instance of action class which is used to add sub parsers.
         """
         return _SubparsersWrapper(
-            super(ArgumentParser, self).add_subparsers(**kwargs))
+            super(ArgumentParser, self).add_subparsers(**kwargs), lazy=lazy)
 
+    @_profiled("add_argument", lambda self, *args, **kwargs: self.prog)
     def add_argument(self, *args, **kwargs):
         """Add an argument.
 
@@ -295,24 +2054,63 @@ class ArgumentParser(argparse.ArgumentParser):
         and defines same name variable, this function sets such
         definition to the help message.
 
+        Names are matched to the documented arguments after removing leading
+        prefix characters and treating ``-`` and ``_`` as the same character,
+        i.e. ``--batch-size`` finds the definition of ``batch_size``.
+        If ``dest`` is given, it is looked up first.
+
+        With ``stream=True``, an argument taking one or more values, such as one
+        documented as ``list[int]``, is given to the command as a lazy iterator.
+        Each value can also be ``@file`` (or ``@glob``) to read values from lines
+        of files, or ``-`` to read them from the standard input. Values are
+        converted when the command reads them, so invalid values raise
+        exceptions in the command instead of parse errors.
+
         Positional Args:
           same positional arguments as argparse.ArgumentParser.add_argument.
 
         Keyword Args:
           same keywards arguments as argparse.ArgumentParser.add_argument.
+          stream: if True, values of the argument are streamed.
         """
-        for name in args:
-            name = re.sub(r'^-*', '', name)
-            if name in self.__argmap:
-                arginfo = self.__argmap[name]
-                for key, value in arginfo.items():
-                    if key in kwargs: continue
-                    if value is None: continue
-                    kwargs[key] = value
-                break
-        return super(ArgumentParser, self).add_argument(*args, **kwargs)
-
-    def add_arguments_auto(self, excludes=None, kind='optional', **kargs):
+        stream = kwargs.pop("stream", False)
+        arginfo = explicit = None
+        if kwargs.get(_ACTION) not in ("help", "version"):
+            arginfo = self._lookup(args, kwargs.get("dest"))
+        if arginfo is not None:
+            explicit = dict(kwargs)
+            for key, value in arginfo.items():
+                if key in kwargs: continue
+                if value is None: continue
+                if key == _REQUIRED and not args[0][:1] in self.prefix_chars: continue
+                kwargs[key] = value
+        if stream and kwargs.get(_NARGS) in ("+", "*") and kwargs.get(_ACTION, "store") == "store":
+            kwargs[_ACTION], kwargs["convert"] = _StreamAction, kwargs.pop(_TYPE, None)
+        action = super(ArgumentParser, self).add_argument(*args, **kwargs)
+        if arginfo is not None: self._derived.append((args, explicit, stream, action))
+        return action
+
+    def _lookup(self, names, dest=None):
+        """Find the documented definition of an argument.
+
+        Args:
+          names: option strings or the name of a positional argument.
+          dest: the ``dest`` keyword argument, if given.
+
+        Returns:
+          an :class:`ArgSpec` object or None if the argument isn't documented.
+        """
+        index = self.__argindex
+        if not index: return None
+        if dest:
+            arginfo = index.get(dest.replace("-", "_"))
+            if arginfo is not None: return arginfo
+        for name in names:
+            arginfo = index.get(name.lstrip(self.prefix_chars).replace("-", "_"))
+            if arginfo is not None: return arginfo
+        return None
+
+    def add_arguments_auto(self, excludes=None, kind='optional', config=None, env_prefix=None, **kargs):
         '''Add arguments of the function automatically
 
         This function will add arguments of the function which this instance
@@ -325,12 +2123,24 @@ class ArgumentParser(argparse.ArgumentParser):
             - default: the default value of the arg. retrieved from default value in the function definition
             - required: True if default value can be identified, otherwise False
 
+        Defaults of optional arguments can be overridden by a config file and
+        environment variables. They are resolved every time arguments are
+        parsed, in the order of the command line, ``PREFIX_ARGNAME``
+        environment variables, the config file, and the function definition.
+        An argument given by a config file or an environment variable is no
+        longer required.
+
         Args:
             excludes: list of arguments that shouldn't be added by this function.
             kind: as which kind arguments should be registered.
                 Possible values:
                     'optional': optinal args. added with '--' prefix
                     'positional': optinal args. added with '--' prefix
+            config: path to a TOML, JSON, or INI config file. Values are taken
+                from the table (section) named after the command, then from
+                top-level keys.
+            env_prefix: prefix of environment variables, e.g. ``MYAPP`` reads
+                ``MYAPP_ARGNAME``.
             kargs: additional arguments to add_argument function.
 
         Returns:
@@ -340,23 +2150,1174 @@ class ArgumentParser(argparse.ArgumentParser):
         elif kind == 'positional': prefix = ''
         else: raise ValueError
 
+        added, layered = [], []
         for name in self.__argmap:
-            self.add_argument(prefix + name)
+            if excludes and name in excludes: continue
+            action = self.add_argument(prefix + name, **kargs)
+            added.append(action)
+            if action.option_strings: layered.append((action, action.default, action.required))
+        if not (config or env_prefix): layered = None
+        else:
+            if env_prefix and not env_prefix.endswith("_"): env_prefix += "_"
+            self._layers.append((config, env_prefix, layered))
+        self._autos.append((excludes, prefix, kargs, added, layered))
         return self
 
-    def parse_and_run(self, **kwargs):
+    def _apply_layers(self):
+        """Set defaults given by config files and environment variables.
+
+        Returns:
+          a list of actions and their original defaults and required flags.
+        """
+        applied = []
+        section = self.prog.split()[-1] if self.prog else None
+        for config, env_prefix, actions in self._layers:
+            values = {}
+            if config:
+                try:
+                    data = _load_config(config)
+                except ImportError:
+                    self._restore_layers(applied)
+                    self.error("reading {0} requires tomli; install dsargparse[toml]".format(config))
+                values.update((k, v) for k, v in data.items() if not isinstance(v, dict))
+                if isinstance(data.get(section), dict): values.update(data[section])
+                values = dict((k.replace("-", "_"), v) for k, v in values.items())
+            for action, default, required in actions:
+                applied.append((action, default, required))
+                name = action.dest
+                if env_prefix and env_prefix + name.upper() in os.environ:
+                    value, source = os.environ[env_prefix + name.upper()], env_prefix + name.upper()
+                elif name in values:
+                    value, source = values[name], config
+                else:
+                    continue
+                try:
+                    action.default = self._layered_value(action, value)
+                except (TypeError, ValueError, argparse.ArgumentTypeError) as e:
+                    self._restore_layers(applied)
+                    self.error("invalid value of {0} in {1}: {2!r} ({3})".format(name, source, value, e))
+                action.required = False
+        return applied
+
+    @staticmethod
+    def _restore_layers(applied):
+        """Restore defaults changed by :meth:`_apply_layers`."""
+        for action, default, required in applied:
+            action.default, action.required = default, required
+
+    @staticmethod
+    def _layered_value(action, value):
+        """Convert a value in a config file or an environment variable for an action."""
+        if action.nargs == 0:
+            if isinstance(value, str): value = value.strip().lower() in ("1", "true", "yes", "on")
+            if isinstance(action.const, bool): return bool(value)
+            return action.const if value else action.default
+        convert = action.type or getattr(action, "convert", None)
+        if action.nargs in ("+", "*") or isinstance(action.nargs, int):
+            if isinstance(value, str):
+                import shlex
+                value = shlex.split(value)
+            return [convert(v) if convert and isinstance(v, str) else v for v in value]
+        return convert(value) if convert and isinstance(value, str) else value
+
+    def parse_known_args(self, args=None, namespace=None):
+        if not self._layers:
+            return super(ArgumentParser, self).parse_known_args(args, namespace)
+        applied = self._apply_layers()
+        try:
+            return super(ArgumentParser, self).parse_known_args(args, namespace)
+        finally:
+            self._restore_layers(applied)
+
+    def parse_and_run(self, loop_factory=None, **kwargs):
         """Parse arguments and run the selected command.
 
+        If the arguments request a help or version message, only parsers on
+        the path to the requested sub command are built and the message is
+        printed without parsing the other arguments.
+
+        If the selected command is a coroutine function, the returned
+        coroutine is run on a new event loop until it completes.
+
+        Args:
+          loop_factory: function which returns a new event loop to run coroutine
+            commands, such as ``uvloop.new_event_loop``. If not given,
+            ``asyncio.run`` is used.
+
+        Keyword Args:
+          same keywords arguments as ``argparse.ArgumentParser.parse_args``.
+
+        Returns:
+          any value the selected command returns. It could be ``None``.
+        """
+        args = kwargs.get("args")
+        argv = sys.argv[1:] if args is None else list(args)
+        if self._server and argv and (argv[0] == "--serve" or argv[0].startswith("--serve=")):
+            path = argv[1] if argv[0] == "--serve" and len(argv) > 1 else argv[0][len("--serve="):]
+            if path: return self.serve(path)
+
+        batch = self._batch_file(argv)
+        if batch is not None:
+            if batch == "-": return self.parse_and_run_batch(sys.stdin, loop_factory=loop_factory)
+            with open(batch) as fp:
+                return self.parse_and_run_batch(fp, loop_factory=loop_factory)
+
+        self._short_circuit(argv)
+        res = self._dispatch(**vars(self.parse_args(**kwargs)))
+        if _is_coroutine(res): res = _run_coroutine(res, loop_factory)
+        return res
+
+    def _batch_file(self, argv):
+        """Return the file given by ``--batch`` option if batch mode is enabled."""
+        if not self._batch or not argv: return None
+        if argv[0] == "--batch" and len(argv) > 1: return argv[1]
+        if argv[0].startswith("--batch="): return argv[0][len("--batch="):]
+        return None
+
+    def run_batch(self, lines, loop_factory=None, workers=None, executor="thread"):
+        """Parse and run each line of commands.
+
+        The parser tree is built once and reused for all lines. Each line is
+        split like a shell command line; empty lines and comments starting with
+        ``#`` are skipped. The standard output and error of each command are
+        captured.
+
+        Lines are parsed in the calling thread. If ``workers`` is given,
+        parsed commands are run concurrently in a pool, and records are still
+        yielded in the order of lines. Process pools receive the module and the
+        qualified name of the command function instead of the parser, so that
+        commands must be importable and parsed arguments must be picklable.
+
+        Args:
+          lines: iterable of strings, or of lists of arguments.
+          loop_factory: function which returns a new event loop to run
+            coroutine commands.
+          workers: number of workers. If not given, commands are run one by one
+            in the calling thread.
+          executor: ``thread`` for I/O bound commands or ``process`` for CPU
+            bound ones.
+
+        Yields:
+          a dictionary for each line, which has ``line`` (line number), ``args``,
+          ``status`` (exit code), ``stdout``, ``stderr``, and ``result`` or
+          ``error``.
+        """
+        import collections
+        import shlex
+
+        if executor not in ("thread", "process"):
+            raise ValueError("unknown executor: {0}".format(executor))
+
+        with _RoutedStreams():
+            pool = None
+            if workers:
+                from concurrent import futures
+                if executor == "thread": pool = futures.ThreadPoolExecutor(workers)
+                else: pool = futures.ProcessPoolExecutor(workers)
+
+            try:
+                pending = collections.deque()
+                for number, line in enumerate(lines, 1):
+                    argv = shlex.split(line, comments=True) if isinstance(line, str) else list(line)
+                    if not argv: continue
+
+                    record = _captured_call(lambda: vars(self.parse_args(args=argv)))
+                    record.update(line=number, args=argv)
+                    kwargs = record.pop("result", None)
+                    cmd = kwargs.pop("cmd", None) if kwargs is not None else None
+                    if kwargs is not None and cmd is None:
+                        record.update(status=1, error="no command is selected")
+                    elif kwargs is not None:
+                        if pool is None:
+                            _merge_records(record, _captured_call(
+                                lambda: self._dispatch(cmd, **kwargs), loop_factory))
+                        elif executor == "thread":
+                            record = (record, pool.submit(
+                                _captured_call, functools.partial(self._dispatch, cmd, **kwargs), loop_factory))
+                        else:
+                            record = (record, pool.submit(
+                                _run_in_process, cmd, kwargs, loop_factory))
+                    pending.append(record)
+
+                    while pending and (pool is None or len(pending) > 4 * workers):
+                        yield _finish_record(pending.popleft())
+                while pending:
+                    yield _finish_record(pending.popleft())
+            finally:
+                if pool is not None:
+                    for record in pending:
+                        if isinstance(record, tuple): record[1].cancel()
+                    pool.shutdown()
+
+    def parse_and_run_batch(self, lines, output=None, loop_factory=None, workers=None, executor="thread"):
+        """Parse and run each line of commands, and write results as JSON lines.
+
+        See :meth:`run_batch` for the format of lines and records, and for
+        parallel execution. Results which cannot be serialized to JSON are
+        written with their ``repr``.
+
+        Args:
+          lines: iterable of strings, or of lists of arguments.
+          output: file object results are written to. Defaults to the standard output.
+          loop_factory: function which returns a new event loop to run
+            coroutine commands.
+          workers: number of workers running commands concurrently.
+          executor: ``thread`` or ``process``.
+
+        Returns:
+          0 if all commands succeeded, otherwise 1.
+        """
+        import json
+
+        if output is None: output = sys.stdout
+        status = 0
+        for record in self.run_batch(lines, loop_factory, workers, executor):
+            if record["status"]: status = 1
+            output.write(json.dumps(record, default=repr) + "\n")
+            output.flush()
+        return status
+
+    def serve(self, path, idle_timeout=None, watch=None, restart=True, poll_interval=0.5):
+        """Serve commands to clients connecting to a unix domain socket.
+
+        This process keeps the parser tree and imported command modules, and
+        forks a child for each client, so that clients run concurrently. A
+        client, such as :func:`client`, sends its arguments, environment
+        variables, working directory, and optionally standard input, and
+        receives the standard output, error, and exit status.
+
+        Pending sub command parsers are built before serving, so that children
+        don't build them again.
+
+        Args:
+          path: path to the socket. An existing socket is replaced.
+          idle_timeout: seconds after the last request to shut down. If not
+            given, the server runs until interrupted.
+          watch: list of source files. If any of them changes, the server is
+            restarted by executing the current command line again, or stops if
+            ``restart`` is False. Defaults to files of the main module and the
+            modules which define commands.
+          restart: whether the server is restarted when sources change.
+          poll_interval: seconds between checks of idleness and sources.
+
+        Returns:
+          0 when the server stops.
+
+        Raises:
+          ValueError: if `path` exists and is not a socket.
+        """
+        import json
+        import socketserver
+        import stat
+        import time
+
+        parser = self
+
+        class Handler(socketserver.StreamRequestHandler):
+            """Handler which runs a command requested by a client."""
+
+            def handle(self):
+                request = json.loads(self.rfile.readline().decode("utf-8"))
+                record = parser._serve_request(request)
+                self.wfile.write((json.dumps(record, default=repr) + "\n").encode("utf-8"))
+
+        class Server(socketserver.ForkingMixIn, socketserver.UnixStreamServer):
+            """Server which forks a child for each client."""
+
+            last_active = time.time()
+
+            def process_request(self, request, client_address):
+                Server.last_active = time.time()
+                return super(Server, self).process_request(request, client_address)
+
+        for _ in _walk_parsers(self): pass
+        if watch is None: watch = _source_files(self)
+        mtimes = dict((f, os.stat(f).st_mtime) for f in watch if os.path.exists(f))
+
+        if os.path.exists(path):
+            if not stat.S_ISSOCK(os.stat(path).st_mode):
+                raise ValueError("{0} exists and is not a socket".format(path))
+            os.remove(path)
+        server = Server(path, Handler)
+        server.timeout = poll_interval
+        changed = False
+        try:
+            while True:
+                server.handle_request()
+                server.collect_children()
+                if any(not os.path.exists(f) or os.stat(f).st_mtime != t for f, t in mtimes.items()):
+                    changed = True
+                    break
+                if idle_timeout is not None and not server.active_children:
+                    if time.time() - Server.last_active > idle_timeout: break
+        except KeyboardInterrupt:
+            pass
+        finally:
+            server.server_close()
+            if os.path.exists(path) and stat.S_ISSOCK(os.stat(path).st_mode): os.remove(path)
+
+        if changed and restart:
+            argv = getattr(sys, "orig_argv", None) or [sys.executable] + sys.argv
+            os.execv(sys.executable, argv)
+        return 0
+
+    def _serve_request(self, request):
+        """Run a command requested by a client in a forked child.
+
+        Arguments are dispatched without entry options, so that a client
+        cannot start another server or a batch.
+        """
+        import io
+
+        os.chdir(request.get("cwd") or os.getcwd())
+        if request.get("env") is not None:
+            os.environ.clear()
+            os.environ.update(request["env"])
+        argv = request.get("argv", [])
+        sys.argv[1:] = argv
+        sys.stdin = io.StringIO(request.get("stdin") or "")
+        with _RoutedStreams():
+            def run():
+                """Parse the arguments and run the command."""
+                self._short_circuit(argv)
+                return self._dispatch(**vars(self.parse_args(args=argv)))
+            return _captured_call(run)
+
+    async def parse_and_run_async(self, **kwargs):
+        """Parse arguments and run the selected command in the running event loop.
+
+        This method is a variant of :meth:`parse_and_run` for callers which
+        are already running in an event loop. Coroutine commands are awaited,
+        and other commands are called directly.
+
         Keyword Args:
           same keywords arguments as ``argparse.ArgumentParser.parse_args``.
 
         Returns:
           any value the selected command returns. It could be ``None``.
         """
-        return self._dispatch(**vars(self.parse_args(**kwargs)))
+        args = kwargs.get("args")
+        self._short_circuit(sys.argv[1:] if args is None else list(args))
+        res = self._dispatch(**vars(self.parse_args(**kwargs)))
+        if _is_coroutine(res): res = await res
+        return res
+
+    def _short_circuit(self, argv):
+        """Print a help or version message if requested and exit.
+
+        Sub command names are followed from this parser, and the walk gives up
+        when an argument which is not a sub command nor an option is found.
+        """
+        parser = self
+        for arg in argv:
+            if arg == "--": return
+            action = parser._option_string_actions.get(arg)
+            if isinstance(action, (argparse._HelpAction, argparse._VersionAction)):
+                action(parser, argparse.Namespace(), None, arg)
+                return
+
+            subparsers = _subparsers_actions(parser)
+            if not subparsers:
+                continue
+            if arg[:1] in parser.prefix_chars or arg not in subparsers[0]._name_parser_map:
+                return
+            parser = subparsers[0]._name_parser_map[arg]
+
+    @_profiled("parse_args", lambda self, *args, **kwargs: self.prog)
+    def parse_args(self, *args, **kwargs):
+        res = super(ArgumentParser, self).parse_args(*args, **kwargs)
+        for option, dest in _ENTRY_OPTIONS:
+            if hasattr(res, dest):
+                self.error("{0} must be the first argument of the command line".format(option))
+        return res
+
+    @_profiled("format_help", lambda self: self.prog)
+    def format_help(self):
+        """Format the help message.
+
+        If the docstring cache is enabled with ``help=True``, the message is
+        stored in it and reused by later processes building the same parser.
+        """
+        if _doc_cache is None or not _doc_cache.help:
+            return super(ArgumentParser, self).format_help()
+
+        import shutil
+
+        file_key, digest = _doc_cache._identify_help(self, shutil.get_terminal_size().columns)
+        text = _doc_cache.load(file_key, digest)
+        if text is None:
+            text = super(ArgumentParser, self).format_help()
+            _doc_cache.store(file_key, digest, text)
+        return text
+
+    def replace_command(self, name, func):
+        """Replace the function of a sub command in place.
+
+        Only the docstring of `func` is parsed, and the parser of the sub
+        command is patched instead of rebuilding the parser tree; arguments
+        which took help messages, types, or defaults from the old docstring
+        are added again from the new one, arguments added by
+        :meth:`add_arguments_auto` follow the new arguments of the function,
+        and `func` becomes the default value of ``cmd``. The help and
+        description of the sub command are updated unless they were given
+        explicitly. A pending parser of a lazy sub command is not built, but
+        it will be built from `func`.
+
+        This is useful in long-lived shells reloading modules which define
+        commands, because the cost depends on the replaced command only.
+
+        Args:
+          name: name or alias of the sub command.
+          func: function implements the new process of this command.
+
+        Returns:
+          the ArgumentParser object of the sub command, or a placeholder of it
+          if it is pending.
+
+        Raises:
+          ValueError: if the given function does not have docstrings, or no
+            sub command has the given name.
+        """
+        if not func.__doc__:
+            raise ValueError("No docstrings given in {0}".format(func.__name__))
+        for action in _subparsers_actions(self):
+            if name in action._name_parser_map: break
+        else:
+            raise ValueError("No sub command named {0}".format(name))
+
+        parser = dict.__getitem__(action._name_parser_map, name)
+        names = [k for k, v in dict.items(action._name_parser_map) if v is parser]
+        choice = next((c for c in action._choices_actions if c.dest in names), None)
+        if isinstance(parser, _PendingParser) and parser._parser is not None: parser = parser._parser
+        if isinstance(parser, _PendingParser):
+            if choice is not None and choice.help == _headline(parser._documented.__doc__):
+                choice.help = _headline(func.__doc__)
+            object.__setattr__(parser, "_func", func)
+            object.__setattr__(parser, "_documented", func)
+            return parser
+
+        info, old = _get_doc(func), parser._info
+        if old is not None:
+            if choice is not None and choice.help == old["headline"]: choice.help = info["headline"]
+            if parser.description == old["description"]: parser.description = info["description"]
+        parser.set_defaults(cmd=func)
+        parser._rederive(info)
+        return parser
+
+    def _rederive(self, info):
+        """Add arguments taken from docstrings again with a new parsed docstring."""
+        self.__argmap = info["args"]
+        self.__argindex = {key.replace("-", "_"): value for key, value in self.__argmap.items()}
+        self._info = info
+
+        autos = set(a for auto in self._autos for a in auto[3])
+        derived, self._derived = self._derived, []
+        replaced = {}
+        for args, kwargs, stream, action in derived:
+            index, group, position = self._discard(action)
+            if action in autos and self._lookup(args, kwargs.get("dest")) is None:
+                replaced[action] = None
+                continue
+            new = replaced[action] = self.add_argument(*args, stream=stream, **kwargs)
+            self._actions.remove(new)
+            self._actions.insert(index, new)
+            if group is not None:
+                for g in self._action_groups:
+                    if new in g._group_actions: g._group_actions.remove(new)
+                group._group_actions.insert(position, new)
+
+        for _, _, layered in self._layers:
+            layered[:] = [
+                (replaced[a], replaced[a].default, replaced[a].required) if a in replaced else (a, d, r)
+                for a, d, r in layered if replaced.get(a, a) is not None]
+        for excludes, prefix, kargs, added, layered in self._autos:
+            added[:] = [replaced.get(a, a) for a in added if replaced.get(a, a) is not None]
+            existing = set(a.dest for a in added)
+            for name in self.__argmap:
+                if (excludes and name in excludes) or name in existing: continue
+                action = self.add_argument(prefix + name, **kargs)
+                added.append(action)
+                if layered is not None and action.option_strings:
+                    layered.append((action, action.default, action.required))
+
+    def _discard(self, action):
+        """Remove an action, and return its positions in the parser and in its group."""
+        index = self._actions.index(action)
+        self._remove_action(action)
+        for option in action.option_strings:
+            if self._option_string_actions.get(option) is action: del self._option_string_actions[option]
+        for group in self._action_groups:
+            if action in group._group_actions:
+                position = group._group_actions.index(action)
+                group._group_actions.remove(action)
+                return index, group, position
+        return index, None, None
+
+    def dump(self, path):
+        """Store the parser tree in a snapshot file.
+
+        Pending parsers are built first. Commands, types, and actions are
+        stored by their import paths, and converters by their class names
+        and arguments. The snapshot records the format version, the Python
+        version, and modification times of the main script, modules defining
+        commands, and dsargparse itself; :meth:`load` ignores it once any of
+        them changes.
+
+        Args:
+          path: path to the snapshot file.
+
+        Raises:
+          pickle.PicklingError: if the tree refers an object which cannot be
+            imported, such as a function defined in another function.
+        """
+        import io
+        import pickle
+        import tempfile
+
+        for _ in _walk_parsers(self): pass
+        buf = io.BytesIO()
+        pickle.dump(_snapshot_header(_source_files(self)), buf, protocol=pickle.HIGHEST_PROTOCOL)
+        pickler, _ = _snapshot_pickler()
+        pickler(buf, protocol=pickle.HIGHEST_PROTOCOL).dump(self)
+
+        directory = os.path.dirname(os.path.abspath(path))
+        fd, tmp = tempfile.mkstemp(dir=directory, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as fp:
+                fp.write(buf.getvalue())
+            os.replace(tmp, path)
+        except BaseException:
+            if os.path.exists(tmp): os.remove(tmp)
+            raise
+
+    @classmethod
+    def load(cls, path, build=None):
+        """Load a parser tree from a snapshot file.
+
+        If the snapshot is missing, made by another format or Python version,
+        or older than its sources, the parser is rebuilt by `build` and the
+        snapshot is written again.
+
+        Args:
+          path: path to the snapshot file made by :meth:`dump`.
+          build: function which builds the parser without a snapshot.
+
+        Returns:
+          an ArgumentParser object, or None if the snapshot cannot be used and
+          `build` is not given.
+        """
+        import pickle
+
+        try:
+            with open(path, "rb") as fp:
+                header = pickle.load(fp)
+                if _snapshot_header(header.get("sources", ())) == header:
+                    parser = _snapshot_pickler()[1](fp).load()
+                    if isinstance(parser, cls): return parser
+        except Exception: # pylint: disable=broad-except
+            pass
+
+        if build is None: return None
+        parser = build()
+        try: parser.dump(path)
+        except Exception: pass # pylint: disable=broad-except
+        return parser
 
     @staticmethod
+    @_profiled("_dispatch", lambda cmd, **kwargs: _name_of(cmd))
     def _dispatch(cmd, **kwargs):
         """Dispatch parsed arguments to a command to be run.
         """
         return cmd(**kwargs)
+
+
+# Version of the snapshot format written by ArgumentParser.dump.
+_SNAPSHOT_FORMAT = 1
+
+
+def _snapshot_header(sources):
+    """Make the header of a snapshot recording the versions and the state of source files."""
+    stamps = {}
+    for path in sorted(set(sources) | set([__file__])):
+        path = os.path.abspath(path)
+        try: st = os.stat(path)
+        except OSError: continue
+        stamps[path] = (st.st_mtime_ns, st.st_size)
+    return dict(format=_SNAPSHOT_FORMAT, python=tuple(sys.version_info[:2]), sources=stamps)
+
+
+def _is_identity(obj):
+    """Check an object is the default type function argparse defines in each parser."""
+    return (getattr(obj, "__module__", None) == "argparse"
+            and getattr(obj, "__qualname__", "").endswith(".<locals>.identity"))
+
+
+def _identity(string):
+    """Default type function which returns the given string."""
+    return string
+
+
+def _snapshot_pickler():
+    """Make pickler classes for parser trees.
+
+    argparse's local identity functions are stored as references, and
+    ``argparse.SUPPRESS`` is restored as the same object because argparse
+    compares it by identity.
+    """
+    import pickle
+
+    class Pickler(pickle.Pickler):
+        """Pickler of parser trees."""
+
+        def persistent_id(self, obj): # pylint: disable=method-hidden
+            if obj is argparse.SUPPRESS: return "suppress"
+            return "identity" if _is_identity(obj) else None
+
+    class Unpickler(pickle.Unpickler):
+        """Unpickler of parser trees."""
+
+        def persistent_load(self, pid): # pylint: disable=method-hidden
+            if pid == "suppress": return argparse.SUPPRESS
+            if pid == "identity": return _identity
+            raise pickle.UnpicklingError("unknown persistent id {0!r}".format(pid))
+
+    return Pickler, Unpickler
+
+
+class _Captured(Exception):
+    """Raised to capture a parser when it starts parsing arguments."""
+
+    def __init__(self, parser):
+        super(_Captured, self).__init__()
+        self.parser = parser
+
+
+def _load_parser(target):
+    """Load a parser from a ``module[:attribute]`` specification.
+
+    The attribute can be a parser or a function which builds one, such as the
+    main function of a script. In the latter case, the function is called
+    and the parser is captured when it starts parsing arguments.
+
+    Args:
+      target: ``module[:attribute]`` string. The attribute defaults to ``main``.
+
+    Returns:
+      an argparse.ArgumentParser object.
+
+    Raises:
+      ValueError: if no parser can be found.
+    """
+    module_name, _, attr = target.partition(":")
+    obj = _resolve(module_name, attr or "main")
+    if isinstance(obj, argparse.ArgumentParser): return obj
+
+    def capture(self, *args, **kwargs): # pylint: disable=unused-argument
+        """Replacement of parse_known_args."""
+        raise _Captured(self)
+
+    parse_known_args = argparse.ArgumentParser.parse_known_args
+    argparse.ArgumentParser.parse_known_args = capture
+    try:
+        res = obj()
+    except _Captured as e:
+        return e.parser
+    finally:
+        argparse.ArgumentParser.parse_known_args = parse_known_args
+    if isinstance(res, argparse.ArgumentParser): return res
+    raise ValueError("{0} doesn't build an ArgumentParser".format(target))
+
+
+class _FrozenWriter(object):
+    """Writer of the source code which constructs a frozen parser."""
+
+    _PARSER_DEFAULTS = (
+        ("prefix_chars", "-"), ("fromfile_prefix_chars", None), ("argument_default", None),
+        ("conflict_handler", "error"), ("add_help", True), ("allow_abbrev", True))
+
+    def __init__(self):
+        self.imports = set(["argparse"])
+        self.lines = []
+        self.counter = itertools.count()
+
+    def literal(self, value):
+        """Return an expression which evaluates to the given value."""
+        import ast
+
+        if isinstance(value, argparse.FileType):
+            return "argparse." + repr(value)
+        if isinstance(value, _MethodCommand):
+            self.imports.add("dsargparse")
+            return "dsargparse._MethodCommand({0}, {1!r})".format(self.literal(value.cls), value.__name__)
+        if isinstance(value, _Converter):
+            self.imports.add("dsargparse")
+            return "dsargparse.{0}({1})".format(type(value).__name__, ", ".join(map(self.literal, value._args)))
+        try:
+            expr = repr(value)
+            if ast.literal_eval(expr) == value: return expr
+        except (ValueError, SyntaxError, TypeError, MemoryError, RecursionError):
+            pass
+
+        module = getattr(value, "__module__", None)
+        qualname = getattr(value, "__qualname__", None)
+        if module and qualname and "<" not in qualname:
+            if module == "builtins": return qualname
+            try: obj = _resolve(module, qualname)
+            except (ImportError, AttributeError): obj = None
+            if obj is value:
+                self.imports.add(module)
+                return "{0}.{1}".format(module, qualname)
+        raise ValueError("cannot freeze {0!r}".format(value))
+
+    def call(self, func, args=(), kwargs=None, target=None):
+        """Write a function call statement."""
+        params = [self.literal(v) for v in args]
+        params += ["{0}={1}".format(k, self.literal(v)) for k, v in (kwargs or {}).items()]
+        stmt = "{0}({1})".format(func, ", ".join(params))
+        if target: stmt = "{0} = {1}".format(target, stmt)
+        self.lines.append("    " + stmt)
+
+    def var(self, prefix):
+        """Allocate a new variable name."""
+        return "{0}{1}".format(prefix, next(self.counter))
+
+    def parser_kwargs(self, parser, default_prog):
+        """Collect constructor arguments of a parser.
+
+        The prog is omitted if it equals to the one argparse would compute.
+        """
+        kwargs = {}
+        if parser.prog != default_prog: kwargs["prog"] = parser.prog
+        for key in ("usage", "description", "epilog"):
+            if getattr(parser, key) is not None: kwargs[key] = getattr(parser, key)
+        if parser.formatter_class is CachedHelpFormatter:
+            kwargs["formatter_class"] = argparse.RawTextHelpFormatter
+        elif parser.formatter_class is not argparse.HelpFormatter:
+            kwargs["formatter_class"] = parser.formatter_class
+        for key, default in self._PARSER_DEFAULTS:
+            if getattr(parser, key, default) != default: kwargs[key] = getattr(parser, key)
+        return kwargs
+
+    def action_kwargs(self, parser, action):
+        """Collect arguments of add_argument which re-creates an action."""
+        import inspect
+
+        names = dict((cls, name) for name, cls in parser._registries["action"].items() if name)
+        cls = type(action)
+        option_strings = action.option_strings
+        if isinstance(action, getattr(argparse, "BooleanOptionalAction", ())):
+            option_strings = [s for s in option_strings if not s.startswith("--no-")]
+
+        kwargs = {}
+        if names.get(cls, cls) != "store": kwargs["action"] = names.get(cls, cls)
+        if option_strings: kwargs["dest"] = action.dest
+        params = {}
+        for klass in cls.__mro__:
+            if "__init__" not in vars(klass): continue
+            signature = inspect.signature(klass.__init__).parameters
+            for key, param in signature.items():
+                if param.kind != param.VAR_KEYWORD: params.setdefault(key, param)
+            if all(param.kind != param.VAR_KEYWORD for param in signature.values()): break
+        for key, param in params.items():
+            if key in ("self", "option_strings", "dest") or not hasattr(action, key): continue
+            if key == "required" and not option_strings: continue
+            value = getattr(action, key)
+            if param.default is not inspect.Parameter.empty and value == param.default:
+                if type(value) is type(param.default): continue
+            kwargs[key] = value
+        return option_strings or [action.dest], kwargs
+
+    def write_parser(self, parser, var):
+        """Write statements which add arguments and sub commands to a parser."""
+        containers = {}
+        for group in parser._action_groups:
+            if group is parser._positionals or group is parser._optionals:
+                gvar = var
+            else:
+                gvar = self.var("g")
+                self.call(var + ".add_argument_group", kwargs=dict(
+                    title=group.title, description=group.description), target=gvar)
+            for action in group._group_actions: containers[action] = gvar
+            containers[group] = gvar
+        for group in parser._mutually_exclusive_groups:
+            gvar = self.var("m")
+            self.call(containers.get(group._container, var) + ".add_mutually_exclusive_group",
+                      kwargs=dict(required=group.required), target=gvar)
+            for action in group._group_actions: containers[action] = gvar
+
+        for action in parser._actions:
+            if isinstance(action, argparse._HelpAction) and parser.add_help and action is parser._actions[0]:
+                continue
+            if isinstance(action, argparse._SubParsersAction):
+                self.write_subparsers(action, var)
+                continue
+            args, kwargs = self.action_kwargs(parser, action)
+            self.call(containers.get(action, var) + ".add_argument", args, kwargs)
+
+        if parser._defaults:
+            self.call(var + ".set_defaults", kwargs=parser._defaults)
+
+    def write_subparsers(self, action, var):
+        """Write statements which add sub commands."""
+        svar = self.var("s")
+        kwargs = {}
+        if action.dest is not argparse.SUPPRESS: kwargs["dest"] = action.dest
+        if action.required: kwargs["required"] = action.required
+        if action.help is not None: kwargs["help"] = action.help
+        if action.metavar is not None: kwargs["metavar"] = action.metavar
+        self.call(var + ".add_subparsers", kwargs=kwargs, target=svar)
+
+        helps = dict((a.dest, a.help) for a in action._choices_actions)
+        names = {}
+        for name, parser in action._name_parser_map.items():
+            names.setdefault(id(parser), (parser, []))[1].append(name)
+        for parser, aliases in names.values():
+            name = aliases.pop(0)
+            kwargs = self.parser_kwargs(parser, "{0} {1}".format(action._prog_prefix, name))
+            if aliases: kwargs["aliases"] = aliases
+            for key in (name, "{0} ({1})".format(name, ", ".join(aliases))):
+                if key in helps: kwargs["help"] = helps[key]
+            pvar = self.var("p")
+            self.call(svar + ".add_parser", [name], kwargs, target=pvar)
+            self.write_parser(parser, pvar)
+
+
+def freeze(parser):
+    """Generate source code of a module which constructs an equivalent parser.
+
+    The generated module depends only on ``argparse`` and the modules which
+    define sub command functions, types, and defaults. It provides
+    ``build_parser()`` which returns the parser, and ``main(args=None)`` which
+    parses arguments and runs the selected command as :meth:`ArgumentParser.parse_and_run`.
+
+    Args:
+      parser: an argparse.ArgumentParser object.
+
+    Returns:
+      source code of the frozen module.
+
+    Raises:
+      ValueError: if the parser refers an object which cannot be imported, such
+        as a function defined in another function.
+    """
+    writer = _FrozenWriter()
+    kwargs = writer.parser_kwargs(parser, os.path.basename(sys.argv[0]))
+    writer.call("argparse.ArgumentParser", kwargs=kwargs, target="p")
+    writer.write_parser(parser, "p")
+
+    return "\n".join([
+        '"""Frozen command line parser generated by dsargparse."""',
+        "# This file is automatically generated; do not edit.",
+    ] + ["import {0}".format(m) for m in sorted(writer.imports)] + [
+        "",
+        "",
+        "def build_parser():",
+        '    """Build the parser."""',
+    ] + writer.lines + [
+        "    return p",
+        "",
+        "",
+        "def main(args=None):",
+        '    """Parse arguments and run the selected command."""',
+        "    kwargs = vars(build_parser().parse_args(args))",
+        "    return kwargs.pop('cmd')(**kwargs)",
+        "",
+    ])
+
+
+def _freeze_command(target, output=None):
+    """Generate a frozen parser module.
+
+    Import a command line interface built with dsargparse, and write a module
+    which constructs the equivalent argparse parser without parsing docstrings.
+
+    Args:
+      target (str): ``module[:attribute]`` where the attribute is a parser or
+        the main function building it. The attribute defaults to ``main``.
+      output (str): path to the output file. If not given, the source code is
+        written to the standard output.
+    """
+    source = freeze(_load_parser(target))
+    if output:
+        with open(output, "w") as fp:
+            fp.write(source)
+    else:
+        sys.stdout.write(source)
+    return 0
+
+
+def _completion_nodes(parser):
+    """Collect completion candidates of each sub command in a parser tree.
+
+    Pending parsers are built.
+
+    Args:
+      parser: root parser.
+
+    Returns:
+      a list of tuples of the sub command path (a tuple of names), a list of
+      pairs of a word and its description, and a list of options which take
+      values paired with their choices.
+    """
+    nodes = []
+
+    def first_line(text):
+        """Return the first line of a help message."""
+        if not text or text is argparse.SUPPRESS: return ""
+        return text.strip().splitlines()[0] if text.strip() else ""
+
+    def visit(parser, path):
+        """Visit a parser."""
+        words, values = [], []
+        children = []
+        for action in parser._actions:
+            if action.help is argparse.SUPPRESS: continue
+            if isinstance(action, argparse._SubParsersAction):
+                helps = dict((a.dest, a.help) for a in action._choices_actions)
+                for name, child in action._name_parser_map.items():
+                    helps.setdefault(id(child), helps.get(name))
+                    words.append((name, first_line(helps[id(child)])))
+                    children.append((child, path + (name,)))
+            elif action.option_strings:
+                for option in action.option_strings:
+                    words.append((option, first_line(action.help)))
+                    if action.nargs != 0:
+                        values.append((option, [str(c) for c in action.choices or ()]))
+            elif action.choices:
+                words.extend((str(c), first_line(action.help)) for c in action.choices)
+        nodes.append((path, words, values))
+        for child, child_path in children:
+            visit(child, child_path)
+
+    visit(parser, ())
+    return nodes
+
+
+def _completion_transitions(nodes):
+    """Return case patterns and actions which walk sub commands in completion scripts."""
+    import shlex
+
+    cases = []
+    for path, words, values in nodes:
+        prefix = "".join(" " + name for name in path)
+        names = set(name for name, _ in words) - set(option for option, _ in values)
+        for name, _ in words:
+            if name in names and not name.startswith("-") and any(p == path + (name,) for p, _, _ in nodes):
+                cases.append((shlex.quote(prefix + ":" + name), "cmdpath=" + shlex.quote(prefix + " " + name)))
+        for option, _ in values:
+            cases.append((shlex.quote(prefix + ":" + option), "skip=1"))
+    return cases
+
+
+def _bash_completion(nodes, prog, func):
+    """Generate a bash completion script."""
+    import shlex
+
+    lines = [
+        "{0}() {{".format(func),
+        '    local cur="${COMP_WORDS[COMP_CWORD]}" prev="${COMP_WORDS[COMP_CWORD-1]}"',
+        '    local cmdpath="" skip=0 i opts=""',
+        "    for ((i=1; i<COMP_CWORD; i++)); do",
+        "        if ((skip)); then skip=0; continue; fi",
+        '        case "$cmdpath:${COMP_WORDS[i]}" in',
+    ]
+    lines += ["            {0}) {1};;".format(p, a) for p, a in _completion_transitions(nodes)]
+    lines += ["        esac", "    done", '    case "$cmdpath:$prev" in']
+    for path, _, values in nodes:
+        prefix = "".join(" " + name for name in path)
+        for option, choices in values:
+            if choices: reply = 'compgen -W {0} -- "$cur"'.format(shlex.quote(" ".join(choices)))
+            else: reply = 'compgen -f -- "$cur"'
+            lines.append("        {0}) COMPREPLY=($({1})); return;;".format(
+                shlex.quote(prefix + ":" + option), reply))
+    lines += ["    esac", '    case "$cmdpath" in']
+    for path, words, _ in nodes:
+        prefix = "".join(" " + name for name in path)
+        lines.append("        {0}) opts={1};;".format(
+            shlex.quote(prefix), shlex.quote(" ".join(name for name, _ in words))))
+    lines += [
+        "    esac",
+        '    COMPREPLY=($(compgen -W "$opts" -- "$cur"))',
+        "}",
+        "complete -o default -F {0} {1}".format(func, shlex.quote(prog)),
+    ]
+    return lines
+
+
+def _zsh_completion(nodes, prog, func):
+    """Generate a zsh completion script."""
+    import shlex
+
+    def entry(name, description):
+        """Make an entry of _describe."""
+        name = name.replace("\\", "\\\\").replace(":", "\\:")
+        return shlex.quote("{0}:{1}".format(name, description) if description else name)
+
+    lines = [
+        "{0}() {{".format(func),
+        '    local cmdpath="" skip=0 i',
+        "    local -a opts",
+        "    for ((i=2; i<CURRENT; i++)); do",
+        "        if ((skip)); then skip=0; continue; fi",
+        '        case "$cmdpath:${words[i]}" in',
+    ]
+    lines += ["            ({0}) {1};;".format(p, a) for p, a in _completion_transitions(nodes)]
+    lines += ["        esac", "    done", '    case "$cmdpath:${words[CURRENT-1]}" in']
+    for path, _, values in nodes:
+        prefix = "".join(" " + name for name in path)
+        for option, choices in values:
+            if choices: reply = "compadd -- {0}".format(" ".join(shlex.quote(c) for c in choices))
+            else: reply = "_files"
+            lines.append("        ({0}) {1}; return;;".format(shlex.quote(prefix + ":" + option), reply))
+    lines += ["    esac", '    case "$cmdpath" in']
+    for path, words, _ in nodes:
+        prefix = "".join(" " + name for name in path)
+        lines.append("        ({0}) opts=({1});;".format(
+            shlex.quote(prefix), " ".join(entry(name, description) for name, description in words)))
+    lines += [
+        "    esac",
+        "    _describe 'command' opts",
+        "}",
+        "compdef {0} {1}".format(func, shlex.quote(prog)),
+    ]
+    return lines
+
+
+def _fish_completion(nodes, prog, func):
+    """Generate a fish completion script."""
+    import shlex
+
+    lines = [
+        "function {0}".format(func),
+        "    set -l cmdpath ''",
+        "    set -l skip 0",
+        "    for word in (commandline -opc)[2..-1]",
+        "        if test $skip = 1",
+        "            set skip 0",
+        "            continue",
+        "        end",
+        '        switch "$cmdpath:$word"',
+    ]
+    for pattern, action in _completion_transitions(nodes):
+        key, _, value = action.partition("=")
+        lines += ["            case {0}".format(pattern), "                set {0} {1}".format(key, value)]
+    lines += ["        end", "    end", '    echo "=$cmdpath"', "end"]
+
+    for path, words, values in nodes:
+        prefix = "".join(" " + name for name in path)
+        condition = shlex.quote('test ({0}) = "={1}"'.format(func, re.sub(r'(["$\\])', r"\\\1", prefix)))
+        takes_value = dict(values)
+        for name, description in words:
+            desc = " -d {0}".format(shlex.quote(description)) if description else ""
+            if name.startswith("--"): spec = "-l " + shlex.quote(name[2:])
+            elif name.startswith("-") and len(name) == 2: spec = "-s " + shlex.quote(name[1:])
+            elif name.startswith("-"): spec = "-o " + shlex.quote(name[1:])
+            else:
+                lines.append("complete -c {0} -f -n {1} -a {2}{3}".format(
+                    shlex.quote(prog), condition, shlex.quote(name), desc))
+                continue
+            if name in takes_value:
+                choices = takes_value[name]
+                spec += " -x -a {0}".format(shlex.quote(" ".join(choices))) if choices else " -r"
+            lines.append("complete -c {0} -n {1} {2}{3}".format(shlex.quote(prog), condition, spec, desc))
+    return lines
+
+
+_COMPLETION_SHELLS = dict(bash=_bash_completion, zsh=_zsh_completion, fish=_fish_completion)
+
+
+def completion_script(parser, shell="bash", prog=None):
+    """Generate a static shell completion script of a parser tree.
+
+    The script contains all sub commands, options, and their help messages,
+    so that completion doesn't start Python at all. Options which take values
+    complete their choices, or file names if they have no choices.
+
+    Args:
+      parser: an argparse.ArgumentParser object.
+      shell: ``bash``, ``zsh``, or ``fish``.
+      prog: name of the command to be completed. Defaults to ``parser.prog``.
+
+    Returns:
+      source code of the completion script.
+
+    Raises:
+      ValueError: if the shell is not supported.
+    """
+    if shell not in _COMPLETION_SHELLS:
+        raise ValueError("unsupported shell: {0}".format(shell))
+    if not prog: prog = parser.prog
+    func = "_" + re.sub(r"\W", "_", prog) + "_complete"
+    lines = ["# {0} completion for {1} generated by dsargparse.".format(shell, prog)]
+    if shell == "zsh": lines.insert(0, "#compdef {0}".format(prog))
+    lines += _COMPLETION_SHELLS[shell](_completion_nodes(parser), prog, func)
+    return "\n".join(lines) + "\n"
+
+
+def _completion_command(shell, target, prog=None, output=None):
+    """Generate a shell completion script.
+
+    Import a command line interface built with dsargparse, and write a static
+    completion script which doesn't start Python on completion.
+
+    Args:
+      shell (str): ``bash``, ``zsh``, or ``fish``.
+      target (str): ``module[:attribute]`` where the attribute is a parser or
+        the main function building it. The attribute defaults to ``main``.
+      prog (str): name of the command to be completed. Defaults to the module name.
+      output (str): path to the output file. If not given, the script is
+        written to the standard output.
+    """
+    script = completion_script(_load_parser(target), shell, prog or target.partition(":")[0].split(".")[-1])
+    if output:
+        with open(output, "w") as fp:
+            fp.write(script)
+    else:
+        sys.stdout.write(script)
+    return 0
+
+
+def _client_command(socket, args, stdin=False):
+    """Run a command on a server.
+
+    Send arguments, environment variables, and working directory to a server
+    started with ``--serve``, and print outputs of the command.
+
+    Args:
+      socket (str): path to the unix domain socket of the server.
+      args (str): arguments of the command.
+      stdin: send the standard input to the command, reading it until EOF.
+    """
+    return client(socket, args, stdin=True if stdin else None)
+
+
+def _main():
+    """ The main function.
+    """
+    parser = ArgumentParser(main=_main, prog="python -m dsargparse")
+    subparsers = parser.add_subparsers(required=True)
+
+    freeze_cmd = subparsers.add_parser(_freeze_command, name="freeze")
+    freeze_cmd.add_argument("target")
+    freeze_cmd.add_argument("-o", "--output")
+
+    completion_cmd = subparsers.add_parser(_completion_command, name="completion")
+    completion_cmd.add_argument("shell", choices=sorted(_COMPLETION_SHELLS))
+    completion_cmd.add_argument("target")
+    completion_cmd.add_argument("--prog")
+    completion_cmd.add_argument("-o", "--output")
+
+    client_cmd = subparsers.add_parser(_client_command, name="client")
+    client_cmd.add_argument("--stdin", action="store_true")
+    client_cmd.add_argument("socket")
+    client_cmd.add_argument("args", nargs=argparse.REMAINDER)
+    return parser.parse_and_run()
+
+
+if __name__ == "__main__":
+    # Run the imported module instead of this __main__ copy, so that classes
+    # used by target command line interfaces are the ones checked here.
+    import dsargparse
+    if sys.argv[1:2] == ["client"] and len(sys.argv) > 2 and not sys.argv[2].startswith("-"):
+        sys.exit(dsargparse.client(sys.argv[2], sys.argv[3:]))
+    sys.exit(dsargparse._main())
@@ -9,9 +9,9 @@
 #
 """Package information of docstrings based argparse.
 """
+import ast
 from os import path
 from setuptools import setup
-import dsargparse
 
 
 def read(fname):
@@ -24,9 +24,11 @@ setup(
     version="0.3.2",
     author="Yoshihiko Ueno, Junpei Kawamoto",
     author_email="kawamoto.junpei@gmail.com",
-    description=dsargparse.__doc__,
+    description=ast.get_docstring(ast.parse(read("dsargparse.py"))),
     long_description=read("README.rst"),
     py_modules=["dsargparse"],
+    python_requires=">=3.7",
+    extras_require={"toml": ["tomli; python_version<'3.11'"]},
     test_suite="tests.suite",
     license="MIT",
     keywords="cli helper argparse",
@@ -38,6 +40,13 @@ setup(
         "License :: OSI Approved :: MIT License",
         "Natural Language :: English",
         "Programming Language :: Python",
+        "Programming Language :: Python :: 3",
+        "Programming Language :: Python :: 3 :: Only",
+        "Programming Language :: Python :: 3.7",
+        "Programming Language :: Python :: 3.8",
+        "Programming Language :: Python :: 3.9",
+        "Programming Language :: Python :: 3.10",
+        "Programming Language :: Python :: 3.11",
         "Topic :: Software Development",
         "Topic :: Utilities"
     ]
@@ -12,12 +12,163 @@
 """ Unit tests for dsargparse module.
 """
 import argparse
+import asyncio
+import contextlib
+import datetime
+import enum
+import io
+import json
+import os
+import pathlib
+import shutil
+import subprocess
+import sys
+import tempfile
 import textwrap
+import time
+import typing
 import unittest
+from unittest import mock
 
 import dsargparse
 
 
+def frozen_command(one, two=2, flag=False):
+    """Command used to test frozen parsers.
+
+    Args:
+      one (list[int]): definition of one.
+      two: definition of two.
+      flag (bool): definition of flag.
+    """
+    return one, two, flag
+
+
+def reloaded_command(one, three=3.0, **kwargs): # pylint: disable=unused-argument
+    """Command used to test replaced commands.
+
+    It replaces frozen_command.
+
+    Args:
+      one (int): new definition of one.
+      three: definition of three.
+    """
+    return one, three
+
+
+async def async_command(value, delay=0.):
+    """Command used to test coroutine commands.
+
+    Args:
+      value: value to be returned.
+      delay (float): seconds to sleep.
+    """
+    await asyncio.sleep(delay)
+    return value
+
+
+def echo_command(message, status=0):
+    """Command used to test batch mode.
+
+    Args:
+      message: message to be printed.
+      status (int): exit status.
+    """
+    print(message)
+    return status
+
+
+def cat_command(name):
+    """Command used to test server mode.
+
+    Args:
+      name: name of an environment variable to be printed.
+    """
+    sys.stdout.write("{0} {1} {2}".format(os.environ.get(name), os.getcwd(), sys.stdin.read()))
+    return 5
+
+
+class Color(enum.Enum):
+    """Enum used to test converters."""
+    RED = 1
+    BLUE = "b"
+
+
+class Service(object):
+    """Class used to test command groups.
+
+    Args:
+      endpoint: definition of endpoint.
+      retries (int): definition of retries.
+    """
+
+    def __init__(self, endpoint, retries=3):
+        self.endpoint = endpoint
+        self.retries = retries
+
+    def fetch(self, key, timeout=1.5):
+        """Fetch a value.
+
+        Args:
+          key: definition of key.
+          timeout: definition of timeout.
+        """
+        return self.endpoint, self.retries, key, timeout
+
+    @staticmethod
+    def version():
+        """Show the version."""
+        return "1.0"
+
+    def _helper(self):
+        return self
+
+
+class Store(object):
+    """Class used to test constructor arguments without docs.
+
+    Args:
+      path: definition of path.
+    """
+
+    def __init__(self, path, readonly=False):
+        self.path = path
+        self.readonly = readonly
+
+    def get(self, key):
+        """Get a value.
+
+        Args:
+          key: definition of key.
+        """
+        return self.path, self.readonly, key
+
+    @classmethod
+    def create(cls, name):
+        """Create a store.
+
+        Args:
+          name: definition of name.
+        """
+        return cls.__name__, name
+
+
+class CachedStore(Store):
+    """Class used to test the inherited constructor."""
+
+
+def _has_toml():
+    """Return True if a TOML parser, tomllib or tomli, is available.
+    """
+    for name in ("tomllib", "tomli"):
+        try:
+            __import__(name)
+            return True
+        except ImportError:
+            pass
+    return False
+
+
 class TestParser(unittest.TestCase):
     """Unit tests for _parse_doc function.
     """
@@ -143,6 +294,53 @@ class TestParser(unittest.TestCase):
         self.assertEqual(ans['args']['two']['type'], float)
         self.assertEqual(ans['args']['two']['default'], 0.234)
 
+    def test_default_inference_keyword_only(self):
+        """ Test for default values of keyword-only arguments.
+        """
+        def test(one, *, two=0.234, three):
+            """Test docstring.
+
+            Args:
+              one: definition of one.
+              two: definition of two.
+              three: definition of three.
+            """
+            return
+
+        ans = dsargparse._parse_doc(test)
+        self.assertTrue(ans['args']['one']['required'])
+        self.assertEqual(ans['args']['two']['type'], float)
+        self.assertEqual(ans['args']['two']['default'], 0.234)
+        self.assertFalse(ans['args']['two']['required'])
+        self.assertTrue(ans['args']['three']['required'])
+        self.assertIs(dsargparse._signature_defaults(test), dsargparse._signatures[test])
+
+    def test_argument_lookup(self):
+        """ Test documented arguments are found for every spelling of their names.
+        """
+        def test(batch_size=1, max_count=2, other=3):
+            """Test docstring.
+
+            Args:
+              batch_size: definition of batch_size.
+              max_count: definition of max_count.
+              other: definition of other.
+            """
+            return
+
+        parser = dsargparse.ArgumentParser(argmap=dsargparse._parse_doc(test)["args"])
+        helps = {
+            action.dest: action.help for action in (
+                parser.add_argument("--batch-size"),
+                parser.add_argument("-m", "--max_count"),
+                parser.add_argument("-o", dest="other"),
+                parser.add_argument("--unknown"))}
+        self.assertEqual(helps["batch_size"], "definition of batch_size.")
+        self.assertEqual(helps["max_count"], "definition of max_count.")
+        self.assertEqual(helps["other"], "definition of other.")
+        self.assertIsNone(helps["unknown"])
+        self.assertEqual(parser.parse_args(["--batch-size", "4"]).batch_size, 4)
+
     def test_docstring_without_description(self):
         """ Test for a docstring which doesn't have descriptions.
         """
@@ -238,6 +436,1319 @@ class TestParser(unittest.TestCase):
         self.assertEqual(len(ans["args"]), 0)
 
 
+class TestDocStyle(unittest.TestCase):
+    """Unit tests for docstring styles.
+    """
+    def test_numpy(self):
+        """ Test for a NumPy style docstring.
+        """
+        def test(one, two=0.5, three=None):
+            """Test docstring.
+
+            This function do something.
+
+            Parameters
+            ----------
+            one : int
+                definition of one.
+                More detail.
+            two : float, optional
+                definition of two.
+            three, four : list[str]
+                definition of three and four.
+
+            Returns
+            -------
+            int
+                some value.
+            """
+            return
+
+        ans = dsargparse._parse_doc(test)
+        self.assertEqual(ans["headline"], "Test docstring.")
+        self.assertEqual(ans["description"], "Test docstring.\n\nThis function do something.")
+        self.assertEqual(sorted(ans["args"]), ["four", "one", "three", "two"])
+        self.assertEqual(ans["args"]["one"]["help"], "definition of one.\nMore detail.")
+        self.assertEqual(ans["args"]["one"]["type"], int)
+        self.assertEqual(ans["args"]["two"]["type"], float)
+        self.assertEqual(ans["args"]["three"]["nargs"], "+")
+
+    def test_sphinx(self):
+        """ Test for a Sphinx style docstring.
+        """
+        def test(one, two=2):
+            """Test docstring.
+
+            This function do something.
+
+            :param int one: definition of one.
+                More detail.
+            :param two: definition of two.
+            :type two: float
+            :returns: some value.
+            """
+            return
+
+        ans = dsargparse._parse_doc(test)
+        self.assertEqual(ans["description"], "Test docstring.\n\nThis function do something.")
+        self.assertEqual(sorted(ans["args"]), ["one", "two"])
+        self.assertEqual(ans["args"]["one"]["help"], "definition of one.\nMore detail.")
+        self.assertEqual(ans["args"]["one"]["type"], int)
+        self.assertEqual(ans["args"]["two"]["type"], float)
+
+    def test_google_sections(self):
+        """ Test an Args section ends at a section indented no deeper than its header.
+        """
+        def test(one, two=2):
+            """Test docstring.
+
+            Args:
+              one: definition of one.
+
+            Keyword Args:
+              two: definition of two.
+
+            Example:
+              test(1)
+            """
+            return
+
+        ans = dsargparse._parse_doc(test)
+        self.assertEqual(sorted(ans["args"]), ["one", "two"])
+
+    def test_register(self):
+        """ Test a registered style takes precedence.
+        """
+        class Style(dsargparse.DocStyle):
+            """Style whose arguments are written as ``@name help``."""
+            name = "at"
+
+            def detect(self, lines):
+                return any(line.lstrip().startswith("@") for line in lines)
+
+            def parse(self, lines):
+                descriptions, entries = [], []
+                for line in lines:
+                    if line.lstrip().startswith("@"):
+                        name, text = line.strip()[1:].split(" ", 1)
+                        entries.append((name, "", text))
+                    elif line: descriptions.append(line)
+                return descriptions, entries
+
+        def test(one):
+            """Test docstring.
+
+            @one definition of one.
+            """
+            return
+
+        style = Style()
+        dsargparse.register_doc_style(style)
+        self.addCleanup(dsargparse._sections.clear)
+        self.addCleanup(dsargparse._doc_styles.remove, style)
+        self.assertEqual(dsargparse._parse_doc(test)["args"]["one"]["help"], "definition of one.")
+
+
+class TestConverter(unittest.TestCase):
+    """Unit tests for converters made from type specifications.
+    """
+    def parse(self, spec, *values):
+        """Parse values with a type specification of an optional argument.
+        """
+        def test(one=None):
+            """Test docstring.
+
+            Args:
+              one ({0}): definition of one.
+            """
+            return
+        test.__doc__ = test.__doc__.format(spec)
+        parser = dsargparse.ArgumentParser(argmap=dsargparse._parse_doc(test)["args"])
+        parser.add_argument("--one")
+        return parser.parse_args(["--one"] + list(values)).one
+
+    def test_types(self):
+        """ Test conversion to types which are not builtins.
+        """
+        self.assertEqual(self.parse("pathlib.Path", "/tmp"), pathlib.Path("/tmp"))
+        self.assertEqual(self.parse("Path", "a"), pathlib.Path("a"))
+        self.assertEqual(self.parse("datetime", "2020-01-02T03:04"), datetime.datetime(2020, 1, 2, 3, 4))
+        self.assertEqual(self.parse("date", "2020-01-02"), datetime.date(2020, 1, 2))
+        self.assertEqual(self.parse("Color", "RED"), Color.RED)
+        self.assertEqual(self.parse("Color", "b"), Color.BLUE)
+
+    def test_generics(self):
+        """ Test conversion to parameterized types.
+        """
+        self.assertEqual(self.parse("dict[str, int]", "a=1,b=2"), {"a": 1, "b": 2})
+        self.assertEqual(self.parse("Optional[float]", "0.5"), 0.5)
+        self.assertIsNone(self.parse("Optional[float]", "None"))
+        self.assertIsNone(self.parse("int | None", ""))
+        self.assertEqual(self.parse("list[Color]", "RED", "b"), [Color.RED, Color.BLUE])
+        self.assertEqual(self.parse("tuple[int, ...]", "1", "2"), [1, 2])
+
+    def test_invalid(self):
+        """ Test invalid values are reported by argparse.
+        """
+        with contextlib.redirect_stderr(io.StringIO()) as stderr, self.assertRaises(SystemExit):
+            self.parse("Color", "GREEN")
+        self.assertIn("invalid Color value", stderr.getvalue())
+
+    def test_unresolved(self):
+        """ Test specifications which are not classes are ignored without evaluation.
+        """
+        for spec in ("os.system", "__import__('os')", "unknown", "list[list[int]]", "Union[int, str]"):
+            self.assertEqual(dsargparse._parse_type_spec(spec, TestConverter.parse), (None, None), spec)
+
+    def test_annotations(self):
+        """ Test annotations are preferred to types in docstrings.
+        """
+        def test(one: int, two: "list[Color]" = (), three: typing.Dict[str, float] = None, four=0, five: "Unknown" = 1.5):
+            """Test docstring.
+
+            Args:
+              one (str): definition of one.
+              two: definition of two.
+              three: definition of three.
+              four (float): definition of four.
+              five: definition of five.
+            """
+            return
+
+        ans = dsargparse._parse_doc(test)["args"]
+        self.assertEqual(ans["one"]["type"], int)
+        self.assertEqual(ans["one"]["help"], "definition of one.")
+        self.assertEqual((ans["two"]["type"], ans["two"]["nargs"]), (dsargparse._EnumMember(Color), "+"))
+        self.assertEqual(ans["three"]["type"], dsargparse._Mapping(str, float))
+        self.assertEqual(ans["four"]["type"], float)
+        self.assertEqual(ans["five"]["type"], float)
+        self.assertIs(dsargparse._annotated_types(test), dsargparse._annotations[test])
+
+    def test_register(self):
+        """ Test registered converters take precedence.
+        """
+        self.addCleanup(dsargparse._converters.clear)
+        self.addCleanup(dsargparse._TYPE_NAMES.pop, "upper")
+        dsargparse.register_type("upper", str.upper)
+        self.assertEqual(self.parse("upper", "abc"), "ABC")
+
+    def test_cached(self):
+        """ Test a specification is resolved once per module.
+        """
+        res = dsargparse._parse_type_spec("dict[str, float]", TestConverter.parse)
+        self.assertIs(dsargparse._parse_type_spec("dict[str, float]", TestConverter.parse), res)
+
+    def test_redefined(self):
+        """ Test cached converters follow classes redefined by reloading modules.
+        """
+        first, second = {}, {}
+        for namespace in (first, second):
+            exec("import enum\nclass Color(enum.Enum):\n    RED = 1\n", namespace) # pylint: disable=exec-used
+        first_type = dsargparse._parse_type_spec("Color", eval("lambda: None", first))[0] # pylint: disable=eval-used
+        second_type = dsargparse._parse_type_spec("Color", eval("lambda: None", second))[0] # pylint: disable=eval-used
+        self.assertIs(type(first_type("RED")), first["Color"])
+        self.assertIs(type(second_type("RED")), second["Color"])
+
+        exec("class Color(enum.Enum):\n    RED = 2\n", first) # pylint: disable=exec-used
+        res = dsargparse._parse_type_spec("Color", eval("lambda: None", first))[0] # pylint: disable=eval-used
+        self.assertIs(type(res("RED")), first["Color"])
+
+
+class TestStream(unittest.TestCase):
+    """Unit tests for streamed list arguments.
+    """
+    def setUp(self):
+        def test(ids=(), name="x"):
+            """Test docstring.
+
+            Args:
+              ids (list[int]): definition of ids.
+              name: definition of name.
+            """
+            return
+        self.parser = dsargparse.ArgumentParser(argmap=dsargparse._parse_doc(test)["args"])
+        self.parser.add_arguments_auto(stream=True)
+        self.directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.directory)
+
+    def write(self, name, text):
+        path = os.path.join(self.directory, name)
+        with open(path, "w") as fp:
+            fp.write(text)
+        return path
+
+    def test_values(self):
+        """ Test values in the command line are converted lazily.
+        """
+        ids = self.parser.parse_args(["--ids", "1", "x", "--name", "y"]).ids
+        self.assertEqual(next(ids), 1)
+        with self.assertRaises(ValueError):
+            next(ids)
+        self.assertEqual(self.parser.parse_args(["--name", "y"]).ids, ())
+
+    def test_files(self):
+        """ Test values are read from files, globs, and stdin.
+        """
+        one = self.write("one.txt", "1\n2\n\n")
+        self.write("two.txt", "3\n")
+        args = ["--ids", "0", "@" + one, "@" + os.path.join(self.directory, "t*.txt"), "-"]
+        with mock.patch("sys.stdin", io.StringIO("4\n5\n")):
+            self.assertEqual(list(self.parser.parse_args(args).ids), [0, 1, 2, 3, 4, 5])
+
+    def test_frozen(self):
+        """ Test a frozen parser keeps streamed arguments.
+        """
+        namespace = {}
+        exec(dsargparse.freeze(self.parser), namespace) # pylint: disable=exec-used
+        self.assertEqual(list(namespace["build_parser"]().parse_args(["--ids", "1", "2"]).ids), [1, 2])
+
+
+class TestLayeredDefaults(unittest.TestCase):
+    """Unit tests for defaults given by config files and environment variables.
+    """
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.directory)
+        self.addCleanup(dsargparse._configs.clear)
+
+    def make_parser(self, config):
+        parser = dsargparse.ArgumentParser(prog="test")
+        subparsers = parser.add_subparsers()
+        subparsers.add_parser(frozen_command).add_arguments_auto(config=config, env_prefix="TEST")
+        return parser
+
+    def write(self, name, text):
+        path = os.path.join(self.directory, name)
+        with open(path, "w") as fp:
+            fp.write(textwrap.dedent(text))
+        return path
+
+    def parse(self, parser, *args):
+        with mock.patch.dict(os.environ, dict(a for a in args if isinstance(a, tuple))):
+            return vars(parser.parse_args(["frozen_command"] + [a for a in args if isinstance(a, str)]))
+
+    def test_formats(self):
+        """ Test defaults are read from TOML, JSON, and INI files.
+        """
+        for name, text in (
+                ("c.toml", """\
+                    two = 3
+                    [frozen_command]
+                    one = [1, 2]
+                    flag = true
+                    """),
+                ("c.json", '{"two": 3, "frozen_command": {"one": [1, 2], "flag": true}}'),
+                ("c.ini", """\
+                    [DEFAULT]
+                    two = 3
+                    [frozen_command]
+                    one = 1 2
+                    flag = yes
+                    """)):
+            if name.endswith(".toml") and not _has_toml(): continue
+            ans = self.parse(self.make_parser(self.write(name, text)))
+            self.assertEqual((ans["one"], ans["two"], ans["flag"]), ([1, 2], 3, True), name)
+
+    def test_precedence(self):
+        """ Test the command line, environment variables, and config files are applied in this order.
+        """
+        parser = self.make_parser(self.write("c.json", '{"one": [1], "two": 3}'))
+        self.assertEqual(self.parse(parser)["two"], 3)
+        self.assertEqual(self.parse(parser, ("TEST_TWO", "4"))["two"], 4)
+        self.assertEqual(self.parse(parser, ("TEST_TWO", "4"), "--two", "5")["two"], 5)
+        self.assertEqual(self.parse(parser, ("TEST_ONE", "7 8"))["one"], [7, 8])
+
+    def test_required(self):
+        """ Test required arguments are still required without config files.
+        """
+        parser = self.make_parser(os.path.join(self.directory, "missing.json"))
+        with contextlib.redirect_stderr(io.StringIO()), self.assertRaises(SystemExit):
+            self.parse(parser)
+        self.assertEqual(self.parse(parser, ("TEST_ONE", "1"))["one"], [1])
+        with contextlib.redirect_stderr(io.StringIO()), self.assertRaises(SystemExit):
+            self.parse(parser)
+
+    def test_invalid(self):
+        """ Test invalid values are reported with their sources.
+        """
+        parser = self.make_parser(None)
+        with contextlib.redirect_stderr(io.StringIO()) as stderr, self.assertRaises(SystemExit):
+            self.parse(parser, ("TEST_ONE", "x"))
+        self.assertIn("TEST_ONE", stderr.getvalue())
+
+    def test_cached(self):
+        """ Test config files are parsed again only when they are modified.
+        """
+        path = self.write("c.json", '{"one": [1]}')
+        parser = self.make_parser(path)
+        self.parse(parser)
+        with mock.patch("json.load") as load:
+            self.parse(parser)
+        self.assertFalse(load.called)
+
+        self.write("c.json", '{"one": [1, 2]}')
+        os.utime(path, ns=(0, 0))
+        self.assertEqual(self.parse(parser)["one"], [1, 2])
+
+    def test_missing_toml(self):
+        """ Test a missing TOML parser is reported as a parse error.
+        """
+        parser = self.make_parser(self.write("c.toml", "two = 3\n"))
+        with mock.patch.dict(sys.modules, {"tomllib": None, "tomli": None}):
+            with contextlib.redirect_stderr(io.StringIO()) as err, self.assertRaises(SystemExit):
+                self.parse(parser, "--one", "1")
+        self.assertIn("requires tomli", err.getvalue())
+
+
+class TestArgSpec(unittest.TestCase):
+    """Unit tests for ArgSpec class.
+    """
+    def test_immutable(self):
+        """ Test fields of an ArgSpec cannot be modified.
+        """
+        spec = dsargparse.ArgSpec(help="definition of one.", type=int, default=1)
+        with self.assertRaises(AttributeError):
+            spec.help = "changed"
+        with self.assertRaises(AttributeError):
+            spec.other = 0
+
+    def test_mapping(self):
+        """ Test an ArgSpec behaves as a read-only dictionary.
+        """
+        spec = dsargparse.ArgSpec(help="definition of one.", type=int, default=1, required=False)
+        self.assertEqual(spec["help"], "definition of one.")
+        self.assertEqual(spec, {
+            "help": "definition of one.", "type": int, "nargs": None,
+            "action": None, "default": 1, "required": False})
+        self.assertEqual(dict(**spec)["default"], 1)
+        with self.assertRaises(KeyError):
+            spec["other"] # pylint: disable=pointless-statement
+
+    def test_missing_default(self):
+        """ Test ``default`` is not a key if no default value is given.
+        """
+        spec = dsargparse.ArgSpec(help="definition of one.", required=True)
+        self.assertNotIn("default", spec)
+        self.assertIsNone(spec.get("default"))
+        self.assertEqual(len(spec), 5)
+
+    def test_pickle(self):
+        """ Test an ArgSpec survives pickling.
+        """
+        import pickle
+        for spec in (dsargparse.ArgSpec(help="one", default=None), dsargparse.ArgSpec(help="two")):
+            self.assertEqual(pickle.loads(pickle.dumps(spec)), spec)
+            self.assertEqual(
+                "default" in pickle.loads(pickle.dumps(spec)), "default" in spec)
+
+
+class TestCommandGroup(unittest.TestCase):
+    """Unit tests for sub commands made from a class.
+    """
+    def make_parser(self, lazy=False):
+        parser = dsargparse.ArgumentParser()
+        parser.add_subparsers(lazy=lazy).add_commands(Service)
+        return parser
+
+    def test_commands(self):
+        """ Test public methods become sub commands taking constructor options.
+        """
+        for lazy in (False, True):
+            parser = self.make_parser(lazy)
+            self.assertEqual(
+                parser.parse_and_run(args=["fetch", "--key", "a", "--endpoint", "host"]),
+                ("host", 3, "a", 1.5))
+            self.assertEqual(
+                parser.parse_and_run(args=["fetch", "--key", "a", "--endpoint", "host", "--retries", "5"]),
+                ("host", 5, "a", 1.5))
+            self.assertEqual(parser.parse_and_run(args=["version"]), "1.0")
+            for args in (["_helper"], ["version", "--endpoint", "host"]):
+                with contextlib.redirect_stderr(io.StringIO()), self.assertRaises(SystemExit):
+                    parser.parse_args(args)
+
+    def test_constructor_options(self):
+        """ Test every named constructor argument is an option, documented by the class defining it.
+        """
+        parser = dsargparse.ArgumentParser()
+        parser.add_subparsers().add_commands(CachedStore)
+        self.assertEqual(parser.parse_and_run(args=["get", "--key", "a", "--path", "p"]), ("p", False, "a"))
+        self.assertEqual(
+            parser.parse_and_run(args=["get", "--key", "a", "--path", "p", "--readonly"]), ("p", True, "a"))
+        with contextlib.redirect_stderr(io.StringIO()), self.assertRaises(SystemExit):
+            parser.parse_args(["get", "--key", "a"])
+        text = parser._subparsers._group_actions[0].choices["get"].format_help()
+        self.assertIn("definition of path.", text)
+        self.assertIn("--readonly", text)
+
+    def test_class_method(self):
+        """ Test class methods are called on the class without constructor options.
+        """
+        parser = dsargparse.ArgumentParser()
+        parser.add_subparsers().add_commands(CachedStore)
+        self.assertEqual(parser.parse_and_run(args=["create", "--name", "x"]), ("CachedStore", "x"))
+        self.assertNotIn("--path", parser._subparsers._group_actions[0].choices["create"].format_help())
+
+    def test_help(self):
+        """ Test help messages come from docstrings of methods and the class.
+        """
+        parser = self.make_parser()
+        self.assertIn("Fetch a value.", parser.format_help())
+        fetch = parser._subparsers._group_actions[0].choices["fetch"]
+        text = fetch.format_help()
+        self.assertIn("Service options", text)
+        self.assertIn("definition of endpoint.", text)
+        self.assertIn("definition of timeout.", text)
+
+    def test_cached(self):
+        """ Test a class is introspected once.
+        """
+        self.make_parser()
+        with mock.patch("dsargparse._parse_doc") as parse_doc:
+            self.make_parser()
+            self.assertEqual(
+                sorted(c[0][0].__name__ for c in parse_doc.call_args_list), ["fetch", "version"])
+
+    def test_pickle(self):
+        """ Test commands survive pickling for process pools.
+        """
+        import pickle
+        cmd = self.make_parser().parse_args(["version"]).cmd
+        self.assertEqual(pickle.loads(pickle.dumps(cmd)), cmd)
+
+
+class TestDocCache(unittest.TestCase):
+    """Unit tests for DocCache class.
+    """
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.cache = dsargparse.DocCache(self.directory)
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def test_hit(self):
+        """ Test a second lookup is served from the cache.
+        """
+        def test(one=1):
+            """Test docstring.
+
+            Args:
+              one: definition of one.
+            """
+            return
+
+        ans = self.cache.get(test)
+        self.assertEqual(len(os.listdir(self.directory)), 1)
+        self.assertEqual(self.cache.load(*self.cache._identify(test)), ans)
+        self.assertEqual(ans["args"]["one"]["default"], 1)
+
+    def test_invalidation(self):
+        """ Test a changed docstring invalidates the entry.
+        """
+        def test():
+            """Test docstring."""
+            return
+
+        self.cache.get(test)
+        test.__doc__ = """Changed docstring."""
+        self.assertIsNone(self.cache.load(*self.cache._identify(test)))
+        self.assertEqual(self.cache.get(test)["headline"], "Changed docstring.")
+        self.assertEqual(len(os.listdir(self.directory)), 1)
+
+    def test_registered_type(self):
+        """ Test registering a converter for a type name invalidates entries using it.
+        """
+        def test(one):
+            """Test docstring.
+
+            Args:
+              one (Path): definition of one.
+            """
+            return
+
+        self.assertIs(self.cache.get(test)["args"]["one"]["type"], pathlib.Path)
+        self.addCleanup(dsargparse.register_type, "Path", dsargparse._TYPE_NAMES["Path"])
+        dsargparse.register_type("Path", pathlib.PurePosixPath)
+        self.assertIsNone(self.cache.load(*self.cache._identify(test), func=test))
+        self.assertIs(self.cache.get(test)["args"]["one"]["type"], pathlib.PurePosixPath)
+
+    def test_eviction(self):
+        """ Test old entries are removed when the size limit is exceeded.
+        """
+        self.cache.max_size = 0
+        self.cache.get(dsargparse._checker)
+        self.assertEqual(os.listdir(self.directory), [])
+
+
+class TestHelpCache(unittest.TestCase):
+    """Unit tests for cached help messages.
+    """
+    def make_parser(self):
+        parser = dsargparse.ArgumentParser(prog="test", main=frozen_command)
+        subparsers = parser.add_subparsers()
+        subparsers.add_parser(frozen_command, add_arguments_auto=True)
+        return parser, subparsers
+
+    def test_equivalent(self):
+        """ Test cached help messages equal to ones RawTextHelpFormatter formats.
+        """
+        parser, _ = self.make_parser()
+        expected, _ = self.make_parser()
+        expected.formatter_class = argparse.RawTextHelpFormatter
+        self.assertEqual(parser.format_help(), argparse.ArgumentParser.format_help(expected))
+        self.assertEqual(parser.format_help(), argparse.ArgumentParser.format_help(expected))
+
+    def test_invalidation(self):
+        """ Test changes of arguments and sub commands invalidate the message.
+        """
+        parser, subparsers = self.make_parser()
+        parser.format_help()
+        parser.add_argument("--verbose", help="definition of verbose.")
+        self.assertIn("definition of verbose.", parser.format_help())
+        subparsers.add_parser(echo_command)
+        self.assertIn("echo_command", parser.format_help())
+
+        action = parser.add_argument("--level", type=int, default=1, help="level (default: %(default)s).")
+        self.assertIn("(default: 1)", parser.format_help())
+        parser.set_defaults(level=5)
+        self.assertIn("(default: 5)", parser.format_help())
+        action.help = "new definition of level."
+        self.assertIn("new definition of level.", parser.format_help())
+
+    def test_shared_actions(self):
+        """ Test actions shared by parents are formatted with each program name.
+        """
+        parent = argparse.ArgumentParser(add_help=False)
+        parent.add_argument("--verbose", action="store_true", help="make %(prog)s verbose.")
+        alpha = dsargparse.ArgumentParser(
+            prog="alpha", parents=[parent], formatter_class=dsargparse.CachedHelpFormatter)
+        beta = dsargparse.ArgumentParser(
+            prog="beta", parents=[parent], formatter_class=dsargparse.CachedHelpFormatter)
+        self.assertIn("make alpha verbose.", alpha.format_help())
+        self.assertIn("make beta verbose.", beta.format_help())
+
+    def test_persistent(self):
+        """ Test help messages are stored in the docstring cache.
+        """
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory)
+        dsargparse.enable_doc_cache(directory, help=True)
+        self.addCleanup(dsargparse.disable_doc_cache)
+
+        text = self.make_parser()[0].format_help()
+        with mock.patch("argparse.ArgumentParser.format_help") as format_help:
+            self.assertEqual(self.make_parser()[0].format_help(), text)
+            parser, _ = self.make_parser()
+            parser.add_argument("--verbose")
+            parser.format_help()
+        self.assertEqual(format_help.call_count, 1)
+
+
+class TestLazyParser(unittest.TestCase):
+    """Unit tests for lazy sub command parsers.
+    """
+    def setUp(self):
+        self.called = []
+
+        def greeting(name, title="Mr."):
+            """Print a greeting message.
+
+            Args:
+              name: name of the person.
+              title: title of the person.
+            """
+            self.called.append((name, title))
+
+        def goodbye(name):
+            """Print a goodbye message.
+
+            Args:
+              name: name of the person.
+            """
+            return name
+
+        self.parser = dsargparse.ArgumentParser(prog="test")
+        subparsers = self.parser.add_subparsers(lazy=True)
+        subparsers.add_parser(greeting, add_arguments_auto=True)
+        subparsers.add_parser(goodbye).add_argument("--name")
+
+    def test_deferred(self):
+        """ Test parsers are built only when their command is selected.
+        """
+        parsers = self.parser._subparsers._group_actions[0]._name_parser_map
+        self.assertEqual(
+            [type(v) for v in dict.values(parsers)], [dsargparse._PendingParser] * 2)
+
+        self.parser.parse_and_run(args=["greeting", "--name", "Smith"])
+        self.assertEqual(self.called, [("Smith", "Mr.")])
+        self.assertIsInstance(dict.__getitem__(parsers, "greeting"), dsargparse.ArgumentParser)
+        self.assertIsInstance(dict.__getitem__(parsers, "goodbye"), dsargparse._PendingParser)
+
+    def test_replay(self):
+        """ Test calls on a pending parser are replayed.
+        """
+        self.assertEqual(self.parser.parse_and_run(args=["goodbye", "--name", "Smith"]), "Smith")
+
+    def test_help(self):
+        """ Test top level help shows headlines without building parsers.
+        """
+        self.assertIn("Print a goodbye message.", self.parser.format_help())
+
+    def test_headline(self):
+        """ Test headlines are the same as ones of docstrings parsed eagerly.
+        """
+        def test():
+            """Compute x (see Returns: below).
+
+            Returns:
+              x.
+            """
+
+        for doc in (test.__doc__, "Returns:\n  x.", ":param x: x.", "Args:\n  x: x.", "Compute x."):
+            test.__doc__ = doc
+            self.assertEqual(dsargparse._headline(doc), dsargparse._parse_doc(test)["headline"], doc)
+
+    def test_replay_returned_objects(self):
+        """ Test calls on objects returned by a pending parser are replayed.
+        """
+        parser = dsargparse.ArgumentParser(prog="test")
+        subparsers = parser.add_subparsers(lazy=True)
+        group = subparsers.add_parser(frozen_command).add_argument_group("group")
+        group.add_argument("--three", type=int, default=3)
+        self.assertEqual(vars(parser.parse_args(["frozen_command"]))["three"], 3)
+
+    def test_attribute(self):
+        """ Test reading an attribute of a pending parser builds the real parser.
+        """
+        parser = dsargparse.ArgumentParser(prog="test")
+        pending = parser.add_subparsers(lazy=True).add_parser(frozen_command, name="run")
+        pending.add_argument("--three", type=int, default=3)
+        pending.epilog = "see " + pending.prog
+        self.assertEqual(pending.epilog, "see test run")
+        self.assertIs(parser._subparsers._group_actions[0].choices["run"], pending._parser)
+        pending.add_argument("--four", type=int, default=4)
+        self.assertEqual(vars(parser.parse_args(["run"]))["four"], 4)
+        self.assertIn("see test run", pending.format_help())
+
+    def test_returned_attribute(self):
+        """ Test reading an attribute of an object returned by a pending parser builds it.
+        """
+        parser = dsargparse.ArgumentParser(prog="test")
+        pending = parser.add_subparsers(lazy=True).add_parser(frozen_command, name="run")
+        action = pending.add_argument("--extra")
+        action.metavar = "VALUE"
+        action.help = "definition of {0}.".format(action.dest)
+        self.assertIsNotNone(pending._parser)
+        self.assertIn("--extra VALUE  definition of extra.", pending.format_help())
+
+    def test_help_short_circuit(self):
+        """ Test a help request builds only the parser of the requested command.
+        """
+        parsers = self.parser._subparsers._group_actions[0]._name_parser_map
+        out = io.StringIO()
+        with contextlib.redirect_stdout(out):
+            with self.assertRaises(SystemExit):
+                self.parser.parse_and_run(args=["goodbye", "--help"])
+        self.assertIn("usage: test goodbye", out.getvalue())
+        self.assertIsInstance(dict.__getitem__(parsers, "greeting"), dsargparse._PendingParser)
+
+    def test_lazy_on_help(self):
+        """ Test sub commands are lazy by default only when help is requested.
+        """
+        with mock.patch("sys.argv", ["test", "greeting", "--help"]):
+            self.assertTrue(dsargparse.ArgumentParser().add_subparsers()._lazy)
+        with mock.patch("sys.argv", ["test", "greeting"]):
+            self.assertFalse(dsargparse.ArgumentParser().add_subparsers()._lazy)
+
+
+class TestFreeze(unittest.TestCase):
+    """Unit tests for freeze function.
+    """
+    def setUp(self):
+        self.parser = dsargparse.ArgumentParser(prog="test", description="Test command.")
+        subparsers = self.parser.add_subparsers()
+        subparsers.add_parser(frozen_command, name="run", aliases=["r"], add_arguments_auto=True)
+
+    def build(self):
+        """Build a parser from the frozen source code.
+        """
+        namespace = {}
+        exec(dsargparse.freeze(self.parser), namespace) # pylint: disable=exec-used
+        return namespace
+
+    def test_equivalent(self):
+        """ Test the frozen parser parses arguments in the same way.
+        """
+        args = ["r", "--one", "1", "2", "--flag"]
+        frozen = self.build()
+        self.assertEqual(
+            vars(frozen["build_parser"]().parse_args(args)), vars(self.parser.parse_args(args)))
+        self.assertEqual(frozen["main"](args), ([1, 2], 2, True))
+
+    def test_help(self):
+        """ Test the frozen parser has same help messages.
+        """
+        frozen = self.build()["build_parser"]()
+        self.assertEqual(frozen.format_help(), self.parser.format_help())
+        for parser in (frozen, self.parser):
+            subparsers = parser._subparsers._group_actions[0]
+            self.assertIn("definition of one.", subparsers.choices["run"].format_help())
+
+    def test_command(self):
+        """ Test python -m dsargparse freeze writes a parser using argparse only.
+        """
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory)
+        with open(os.path.join(directory, "frozen_cli.py"), "w") as fp:
+            fp.write(textwrap.dedent('''\
+                """Test command line interface."""
+                import enum
+                import dsargparse
+
+                class Color(enum.Enum):
+                    RED = 1
+
+                def paint(color):
+                    """Paint something.
+
+                    Args:
+                      color (Color): a color.
+                    """
+                    return color
+
+                class Service(object):
+                    """Test service."""
+
+                    def ping(self):
+                        """Ping the service."""
+                        return "pong"
+
+                def main():
+                    """The main function."""
+                    parser = dsargparse.ArgumentParser(main=main, prog="test")
+                    subparsers = parser.add_subparsers()
+                    subparsers.add_parser(paint, add_arguments_auto=True)
+                    subparsers.add_commands(Service)
+                    return parser.parse_and_run()
+
+                def plain():
+                    """Build a parser of functions only."""
+                    parser = dsargparse.ArgumentParser(main=main, prog="test")
+                    parser.add_subparsers().add_parser(main)
+                    return parser
+                '''))
+        top = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+        env = dict(os.environ, PYTHONPATH=os.pathsep.join([top, directory]))
+
+        def freeze(target):
+            """Run the freeze command in another process."""
+            return subprocess.run(
+                [sys.executable, "-m", "dsargparse", "freeze", target], cwd=directory, env=env,
+                stdout=subprocess.PIPE, stderr=subprocess.PIPE, universal_newlines=True, check=True).stdout
+
+        self.assertNotIn("import dsargparse", freeze("frozen_cli:plain"))
+        source = freeze("frozen_cli")
+        self.assertNotIn("CachedHelpFormatter", source)
+
+        sys.path.insert(0, directory)
+        self.addCleanup(sys.path.remove, directory)
+        self.addCleanup(sys.modules.pop, "frozen_cli", None)
+        namespace = {}
+        exec(source, namespace) # pylint: disable=exec-used
+        self.assertEqual(namespace["main"](["paint", "--color", "RED"]).name, "RED")
+        self.assertEqual(namespace["main"](["ping"]), "pong")
+
+    def test_local_function(self):
+        """ Test functions which cannot be imported are rejected.
+        """
+        def test():
+            """Test docstring."""
+        self.parser.set_defaults(cmd=test)
+        self.assertRaises(ValueError, dsargparse.freeze, self.parser)
+
+
+class TestSnapshot(unittest.TestCase):
+    """Unit tests for dump and load of parser trees.
+    """
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.directory)
+        self.path = os.path.join(self.directory, "parser.pickle")
+        self.builds = 0
+
+    def build(self):
+        """Build a parser with lazy sub commands.
+        """
+        self.builds += 1
+        parser = dsargparse.ArgumentParser(prog="test", description="Test command.")
+        subparsers = parser.add_subparsers(lazy=True)
+        subparsers.add_parser(frozen_command, name="run", aliases=["r"], add_arguments_auto=True)
+        subparsers.add_commands(Service)
+        return parser
+
+    def test_equivalent(self):
+        """ Test a loaded parser parses arguments in the same way.
+        """
+        parser = self.build()
+        parser.dump(self.path)
+        loaded = dsargparse.ArgumentParser.load(self.path)
+        for args in (["r", "--one", "1", "2", "--flag"], ["fetch", "--key", "a", "--endpoint", "host"]):
+            self.assertEqual(vars(loaded.parse_args(args)), vars(parser.parse_args(args)))
+        self.assertEqual(loaded.parse_and_run(args=["run", "--one", "3"]), ([3], 2, False))
+        self.assertEqual(loaded.format_help(), parser.format_help())
+        self.assertEqual(
+            loaded._subparsers._group_actions[0].choices["run"].format_help(),
+            parser._subparsers._group_actions[0].choices["run"].format_help())
+
+    def test_rebuild(self):
+        """ Test a parser is rebuilt if the snapshot is missing or stale.
+        """
+        self.assertIsNone(dsargparse.ArgumentParser.load(self.path))
+        dsargparse.ArgumentParser.load(self.path, self.build)
+        self.assertEqual(self.builds, 1)
+        dsargparse.ArgumentParser.load(self.path, self.build)
+        self.assertEqual(self.builds, 1)
+
+        with mock.patch("dsargparse._SNAPSHOT_FORMAT", 0):
+            dsargparse.ArgumentParser.load(self.path, self.build)
+        self.assertEqual(self.builds, 2)
+        dsargparse.ArgumentParser.load(self.path, self.build)
+        self.assertEqual(self.builds, 3)
+
+    def test_modified_source(self):
+        """ Test a snapshot is ignored once a module defining commands changes.
+        """
+        source = os.path.join(self.directory, "snapshot_command.py")
+        with open(source, "w") as fp:
+            fp.write('def command():\n    """Test docstring."""\n')
+        sys.path.insert(0, self.directory)
+        self.addCleanup(sys.path.remove, self.directory)
+        self.addCleanup(sys.modules.pop, "snapshot_command", None)
+        import snapshot_command # pylint: disable=import-error
+
+        parser = dsargparse.ArgumentParser(prog="test")
+        parser.add_subparsers().add_parser(snapshot_command.command)
+        parser.dump(self.path)
+        self.assertIsNotNone(dsargparse.ArgumentParser.load(self.path))
+        with open(source, "a") as fp:
+            fp.write("# modified\n")
+        self.assertIsNone(dsargparse.ArgumentParser.load(self.path))
+
+
+class TestReplaceCommand(unittest.TestCase):
+    """Unit tests for replace_command method.
+    """
+    def build(self, lazy):
+        """Build a parser which has frozen_command as run command.
+        """
+        parser = dsargparse.ArgumentParser(prog="test")
+        subparsers = parser.add_subparsers(lazy=lazy)
+        run = subparsers.add_parser(frozen_command, name="run")
+        run.add_arguments_auto(env_prefix="DSARGPARSE_TEST")
+        run.add_argument("--verbose", action="store_true")
+        subparsers.add_parser(echo_command, name="echo", add_arguments_auto=True)
+        return parser
+
+    def test_replace(self):
+        """ Test arguments, help, and the command are replaced in place.
+        """
+        parser = self.build(lazy=False)
+        parser.format_help()
+        run = parser._subparsers._group_actions[0].choices["run"]
+        echo = parser._subparsers._group_actions[0].choices["echo"]
+
+        self.assertIs(parser.replace_command("run", reloaded_command), run)
+        self.assertIs(parser._subparsers._group_actions[0].choices["echo"], echo)
+        self.assertEqual(
+            [a.dest for a in run._actions], ["help", "one", "verbose", "three"])
+        self.assertEqual(
+            [a.dest for a in run._optionals._group_actions], ["help", "one", "verbose", "three"])
+        self.assertNotIn("--two", run._option_string_actions)
+        self.assertEqual(run.description, "Command used to test replaced commands.\n\nIt replaces frozen_command.")
+        self.assertIn("new definition of one.", run.format_help())
+        self.assertIn("Command used to test replaced commands.", parser.format_help())
+
+        self.assertEqual(parser.parse_and_run(args=["run", "--one", "1", "--three", "2"]), (1, 2.0))
+        with mock.patch.dict(os.environ, {"DSARGPARSE_TEST_THREE": "5"}):
+            self.assertEqual(parser.parse_and_run(args=["run", "--one", "1"]), (1, 5.0))
+
+    def test_explicit_texts(self):
+        """ Test help and description given explicitly are kept.
+        """
+        parser = dsargparse.ArgumentParser(prog="test")
+        run = parser.add_subparsers().add_parser(
+            frozen_command, name="run", help="run it.", description="Run something.")
+        parser.replace_command("run", reloaded_command)
+        self.assertEqual(run.description, "Run something.")
+        self.assertIn("run it.", parser.format_help())
+
+    def test_pending(self):
+        """ Test a pending parser is built from the new function.
+        """
+        parser = self.build(lazy=True)
+        parsers = parser._subparsers._group_actions[0]._name_parser_map
+        pending = parser.replace_command("run", reloaded_command)
+        self.assertIsInstance(pending, dsargparse._PendingParser)
+        self.assertIs(dict.__getitem__(parsers, "run"), pending)
+        self.assertIn("Command used to test replaced commands.", parser.format_help())
+        self.assertEqual(parser.parse_and_run(args=["run", "--one", "1", "--verbose"]), (1, 3.0))
+
+    def test_alias(self):
+        """ Test a command replaced through its alias gets the new headline.
+        """
+        for lazy in (False, True):
+            parser = dsargparse.ArgumentParser(prog="test")
+            parser.add_subparsers(lazy=lazy).add_parser(frozen_command, name="run", aliases=["r"])
+            parser.replace_command("r", reloaded_command)
+            text = parser.format_help()
+            self.assertIn("Command used to test replaced commands.", text)
+            self.assertNotIn("Command used to test frozen parsers.", text)
+
+    def test_unknown(self):
+        """ Test unknown commands and functions without docstrings are rejected.
+        """
+        parser = self.build(lazy=False)
+        self.assertRaises(ValueError, parser.replace_command, "unknown", reloaded_command)
+        self.assertRaises(ValueError, parser.replace_command, "run", lambda: None)
+
+
+class TestProfiler(unittest.TestCase):
+    """Unit tests for profiling.
+    """
+    def tearDown(self):
+        dsargparse.disable_profile()
+
+    def test_records(self):
+        """ Test calls are recorded per sub command.
+        """
+        profiler = dsargparse.enable_profile()
+        parser = dsargparse.ArgumentParser(prog="test")
+        parser.add_subparsers().add_parser(frozen_command, add_arguments_auto=True)
+        parser.parse_and_run(args=["frozen_command", "--one", "1"])
+
+        records = dict(((r["name"], r["subject"]), r["calls"]) for r in profiler.report())
+        self.assertEqual(records[("_parse_doc", "frozen_command")], 1)
+        self.assertEqual(records[("extract_default_from_signature", "frozen_command")], 3)
+        self.assertEqual(records[("parse_args", "test")], 1)
+        self.assertEqual(records[("_dispatch", "frozen_command")], 1)
+
+    def test_json(self):
+        """ Test the report is written as JSON.
+        """
+        with tempfile.NamedTemporaryFile(suffix=".json") as fp:
+            dsargparse.ArgumentParser(profile=fp.name)
+            self.assertEqual(dsargparse._profiler.output, fp.name)
+            dsargparse._parse_doc(dsargparse._checker)
+            dsargparse._profiler.dump()
+            with open(fp.name) as report:
+                records = [(r["name"], r["subject"]) for r in json.load(report)]
+            self.assertIn(("_parse_doc", "_checker"), records)
+
+    def test_exit_handler(self):
+        """ Test the report is registered to be written at exit only once.
+        """
+        with mock.patch("atexit.register") as register, mock.patch("dsargparse._profile_registered", False):
+            for _ in range(3):
+                dsargparse.enable_profile()
+                dsargparse.disable_profile()
+        self.assertEqual(register.call_count, 1)
+
+    def test_disabled(self):
+        """ Test nothing is recorded unless profiling is enabled.
+        """
+        self.assertIsNone(dsargparse._profiler)
+        dsargparse._parse_doc(dsargparse._checker)
+        self.assertIsNone(dsargparse._profiler)
+
+
+class TestImportTime(unittest.TestCase):
+    """Regression tests of the import cost of dsargparse.
+    """
+    # Upper bound of the cumulative import time of dsargparse in micro seconds.
+    CAP = 30000
+
+    def run_python(self, *args, **kwargs):
+        """Run python in the top directory of this repository.
+        """
+        return subprocess.run(
+            [sys.executable] + list(args),
+            cwd=os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+            stdout=subprocess.PIPE, stderr=subprocess.PIPE, universal_newlines=True, check=True, **kwargs)
+
+    def test_no_additional_modules(self):
+        """ Test importing dsargparse loads no module argparse doesn't load.
+        """
+        res = self.run_python("-c", textwrap.dedent("""\
+            import sys
+            import argparse
+            before = set(sys.modules)
+            import dsargparse
+            print(sorted(set(sys.modules) - before))"""))
+        self.assertEqual(res.stdout.strip(), "['dsargparse']")
+
+    def test_importtime(self):
+        """ Test the import time of dsargparse measured by -X importtime.
+
+        Byte code is written to a temporary directory beforehand so that
+        compiling the source is not counted.
+        """
+        env = dict(os.environ)
+        env.pop("PYTHONDONTWRITEBYTECODE", None)
+        prefix = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, prefix)
+        self.run_python("-X", "pycache_prefix=" + prefix, "-c", "import dsargparse", env=env)
+        res = self.run_python(
+            "-X", "pycache_prefix=" + prefix, "-X", "importtime", "-c", "import argparse, dsargparse", env=env)
+        for line in res.stderr.splitlines():
+            fields = [f.strip() for f in line.split(":", 1)[-1].split("|")]
+            if fields[-1] == "dsargparse":
+                self.assertLess(int(fields[1]), self.CAP)
+                break
+        else:
+            self.fail("dsargparse is not found in the output")
+
+
+class TestAsync(unittest.TestCase):
+    """Unit tests for coroutine commands.
+    """
+    def setUp(self):
+        self.parser = dsargparse.ArgumentParser(prog="test")
+        subparsers = self.parser.add_subparsers()
+        subparsers.add_parser(async_command, add_arguments_auto=True)
+        subparsers.add_parser(frozen_command, add_arguments_auto=True)
+
+    def test_parse_and_run(self):
+        """ Test a coroutine command is run until it completes.
+        """
+        self.assertEqual(
+            self.parser.parse_and_run(args=["async_command", "--value", "abc"]), "abc")
+
+    def test_loop_factory(self):
+        """ Test a coroutine command is run on a loop made by a given factory.
+        """
+        loops = []
+
+        def factory():
+            """Make a new event loop."""
+            loops.append(asyncio.new_event_loop())
+            return loops[-1]
+
+        self.assertEqual(self.parser.parse_and_run(
+            loop_factory=factory, args=["async_command", "--value", "abc"]), "abc")
+        self.assertEqual(len(loops), 1)
+        self.assertTrue(loops[0].is_closed())
+
+    def test_parse_and_run_async(self):
+        """ Test commands are run in the running event loop.
+        """
+        async def run():
+            """Run both kinds of commands."""
+            return (
+                await self.parser.parse_and_run_async(args=["async_command", "--value", "abc"]),
+                await self.parser.parse_and_run_async(args=["frozen_command", "--one", "1"]))
+        self.assertEqual(asyncio.run(run()), ("abc", ([1], 2, False)))
+
+
+class TestBatch(unittest.TestCase):
+    """Unit tests for batch mode.
+    """
+    def setUp(self):
+        self.parser = dsargparse.ArgumentParser(prog="test", batch=True)
+        subparsers = self.parser.add_subparsers()
+        subparsers.add_parser(echo_command, name="echo", add_arguments_auto=True)
+        subparsers.add_parser(async_command, add_arguments_auto=True)
+
+    def test_run_batch(self):
+        """ Test each line is parsed and run.
+        """
+        records = list(self.parser.run_batch([
+            "# comment",
+            "echo --message 'hello world'",
+            "",
+            ["echo", "--message", "bye", "--status", "3"],
+            "async_command --value abc",
+            "unknown",
+        ]))
+        self.assertEqual([r["line"] for r in records], [2, 4, 5, 6])
+        self.assertEqual([r["status"] for r in records], [0, 3, 0, 2])
+        self.assertEqual(records[0]["stdout"], "hello world\n")
+        self.assertEqual(records[2]["result"], "abc")
+        self.assertIn("invalid choice", records[3]["stderr"])
+
+    def test_thread_pool(self):
+        """ Test commands run in threads keep order and separate outputs.
+        """
+        lines = ["async_command --value {0} --delay {1}".format(i, 0.05 - i * 0.01) for i in range(5)]
+        lines += ["echo --message {0}".format(i) for i in range(20)]
+        records = list(self.parser.run_batch(lines, workers=4))
+        self.assertEqual([r["line"] for r in records], list(range(1, 26)))
+        self.assertEqual([r["result"] for r in records[:5]], [str(i) for i in range(5)])
+        self.assertEqual([r["stdout"] for r in records[5:]], ["{0}\n".format(i) for i in range(20)])
+        self.assertNotIsInstance(sys.stdout, dsargparse._StreamRouter)
+
+    def test_process_pool(self):
+        """ Test commands run in processes are resolved by their names.
+        """
+        records = list(self.parser.run_batch(
+            ["echo --message a --status 2", "unknown", "echo --message b"], workers=2, executor="process"))
+        self.assertEqual([r["status"] for r in records], [2, 2, 0])
+        self.assertEqual(records[2]["stdout"], "b\n")
+
+    def test_batch_option(self):
+        """ Test --batch option writes results as JSON lines.
+        """
+        with tempfile.NamedTemporaryFile("w", suffix=".txt") as fp:
+            fp.write("echo --message a\necho --message b --status 1\n")
+            fp.flush()
+            out = io.StringIO()
+            with contextlib.redirect_stdout(out):
+                status = self.parser.parse_and_run(args=["--batch", fp.name])
+        self.assertEqual(status, 1)
+        records = [json.loads(line) for line in out.getvalue().splitlines()]
+        self.assertEqual([r["stdout"] for r in records], ["a\n", "b\n"])
+        self.assertIn("--batch FILE", self.parser.format_help())
+
+    def test_batch_option_position(self):
+        """ Test --batch option given after other arguments is rejected.
+        """
+        self.parser.add_argument("--verbose", action="store_true")
+        err = io.StringIO()
+        with contextlib.redirect_stderr(err):
+            with self.assertRaises(SystemExit):
+                self.parser.parse_and_run(args=["--verbose", "--batch", "jobs.txt"])
+        self.assertIn("--batch must be the first argument", err.getvalue())
+
+
+class TestServer(unittest.TestCase):
+    """Unit tests for server mode.
+    """
+    SCRIPT = textwrap.dedent("""\
+        import sys
+        import dsargparse
+        from tests import dsargparse_test
+        parser = dsargparse.ArgumentParser(prog="test", server=True)
+        parser.add_subparsers().add_parser(dsargparse_test.cat_command, add_arguments_auto=True)
+        parser.serve(sys.argv[1], idle_timeout=10, watch=[sys.argv[2]], restart=False)
+        """)
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.path = os.path.join(self.directory, "socket")
+        self.source = os.path.join(self.directory, "source.py")
+        with open(self.source, "w") as fp:
+            fp.write("")
+        self.server = subprocess.Popen(
+            [sys.executable, "-c", self.SCRIPT, self.path, self.source],
+            cwd=os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+        for _ in range(100):
+            if os.path.exists(self.path): break
+            time.sleep(0.05)
+
+    def tearDown(self):
+        if self.server.poll() is None: self.server.kill()
+        self.server.wait()
+        shutil.rmtree(self.directory)
+
+    def test_client(self):
+        """ Test a client runs a command on the server.
+        """
+        out = io.StringIO()
+        with mock.patch.dict(os.environ, {"DSARGPARSE_TEST": "value"}):
+            with contextlib.redirect_stdout(out):
+                status = dsargparse.client(self.path, ["cat_command", "--name", "DSARGPARSE_TEST"], "input")
+        self.assertEqual(status, 5)
+        self.assertEqual(out.getvalue(), "value {0} input".format(os.getcwd()))
+
+        err = io.StringIO()
+        with contextlib.redirect_stderr(err):
+            self.assertEqual(dsargparse.client(self.path, ["unknown"], ""), 2)
+        self.assertIn("invalid choice", err.getvalue())
+
+    def test_stdin(self):
+        """ Test the standard input is sent only when it is requested.
+        """
+        argv = ["cat_command", "--name", "DSARGPARSE_TEST"]
+        with mock.patch("sys.stdin", io.StringIO("line1\nline2\n")):
+            with contextlib.redirect_stdout(io.StringIO()) as out:
+                dsargparse.client(self.path, argv)
+            self.assertTrue(out.getvalue().endswith(" "))
+            self.assertEqual(sys.stdin.readline(), "line1\n")
+            with contextlib.redirect_stdout(io.StringIO()) as out:
+                dsargparse.client(self.path, argv, stdin=True)
+            self.assertTrue(out.getvalue().endswith(" line2\n"))
+
+    def test_entry_options(self):
+        """ Test clients cannot start another server.
+        """
+        with contextlib.redirect_stderr(io.StringIO()) as err:
+            self.assertEqual(dsargparse.client(self.path, ["--serve", os.path.join(self.directory, "other")]), 2)
+        self.assertIn("must be the first argument", err.getvalue())
+        self.assertFalse(os.path.exists(os.path.join(self.directory, "other")))
+
+    def test_not_socket(self):
+        """ Test an existing file which is not a socket is not replaced.
+        """
+        parser = dsargparse.ArgumentParser(prog="test", server=True)
+        with self.assertRaises(ValueError):
+            parser.serve(self.source)
+        self.assertTrue(os.path.isfile(self.source))
+
+    def test_source_change(self):
+        """ Test the server stops when a watched source changes.
+        """
+        os.utime(self.source, (0, 0))
+        self.assertEqual(self.server.wait(timeout=10), 0)
+        self.assertFalse(os.path.exists(self.path))
+
+
+class TestCompletion(unittest.TestCase):
+    """Unit tests for completion_script function.
+    """
+    def setUp(self):
+        self.parser = dsargparse.ArgumentParser(prog="test")
+        subparsers = self.parser.add_subparsers(lazy=True)
+        subparsers.add_parser(frozen_command, name="run", add_arguments_auto=True)
+        subparsers.add_parser(echo_command, name="echo").add_argument(
+            "--message", choices=["hello", "bye"])
+
+    @unittest.skipUnless(shutil.which("bash"), "bash is not available")
+    def test_bash(self):
+        """ Test the bash script completes sub commands, options, and choices.
+        """
+        script = dsargparse.completion_script(self.parser, "bash")
+        cases = [
+            ("test ''", "-h --help run echo"),
+            ("test run --o", "--one"),
+            ("test run --one 1 --", "--help --one --two --flag"),
+            ("test echo --message ''", "hello bye"),
+        ]
+        commands = [script]
+        for words, _ in cases:
+            commands.append(
+                "COMP_WORDS=({0}); COMP_CWORD=$((${{#COMP_WORDS[@]}}-1)); "
+                "_test_complete; echo \"${{COMPREPLY[*]}}\"".format(words))
+        res = subprocess.run(
+            ["bash", "-c", "\n".join(commands)], stdout=subprocess.PIPE, universal_newlines=True, check=True)
+        self.assertEqual(res.stdout.splitlines(), [expected for _, expected in cases])
+
+    def test_zsh_and_fish(self):
+        """ Test zsh and fish scripts have docstring derived descriptions.
+        """
+        zsh = dsargparse.completion_script(self.parser, "zsh")
+        self.assertTrue(zsh.startswith("#compdef test\n"))
+        self.assertIn("'run:Command used to test frozen parsers.'", zsh)
+        self.assertIn("'--one:definition of one.'", zsh)
+
+        fish = dsargparse.completion_script(self.parser, "fish")
+        self.assertIn("-a run -d 'Command used to test frozen parsers.'", fish)
+        self.assertIn("-l message -x -a 'hello bye'", fish)
+
+    def test_unsupported(self):
+        """ Test unsupported shells are rejected.
+        """
+        self.assertRaises(ValueError, dsargparse.completion_script, self.parser, "csh")
+
+
 class TestModule(unittest.TestCase):
 
     def test_modules(self):